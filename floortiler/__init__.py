@@ -0,0 +1,37 @@
+"""
+Map-coloring solver for NEWTECHWOOD tiles in "rainbow".
+
+Importing the package does not import NumPy or matplotlib; NumPy is only
+loaded to draw maps, and matplotlib only to show one in a window.
+"""
+from .floorplan import expand_colormap, floor_plan_edges, load_floor_mask, parse_floor_mask, read_png_mask
+from .grid import (RELATIONS, build_neighbor_index, generate_grid_edges, generate_torus_edges, grid_reflections,
+                   rectangle_cells)
+from .local_search import min_conflicts
+from .parallel import solve_coloring_blocks, solve_coloring_parallel
+from .periodic import clear_patch_cache, find_periodic_patch, stamp_patch
+from .render import COLORS, draw_tile_map, save_tile_map, tile_map_image
+from .reporting import (PROGRESS, SILENT, TRACE, new_progress, search_stats, set_verbosity,
+                        write_search_stats)
+from .sat import decode_model, encode_cnf, solve_sat, write_dimacs
+from .solver import (backtrack, backtrack_forward_checking, backtrack_iterative, count_colorings, issafe,
+                     iter_colorings, resolve_region, search_iterative, solve_coloring, solve_periodic,
+                     solve_transfer_matrix, symmetry_breaking_masks)
+from .tiles import (TILES, build_compatibility_tables, build_tile_masks, canonical_catalogue, catalogue_entries,
+                    clear_compatibility_cache, load_tiles, reversal_groups, reversal_index, tile_masks)
+from .validate import count_conflicts, edge_arrays, find_conflicts, grid_edge_arrays
+
+__all__ = [
+    'COLORS', 'PROGRESS', 'RELATIONS', 'SILENT', 'TILES', 'TRACE',
+    'backtrack', 'backtrack_forward_checking', 'backtrack_iterative', 'build_compatibility_tables',
+    'build_neighbor_index', 'build_tile_masks', 'canonical_catalogue', 'catalogue_entries',
+    'clear_compatibility_cache', 'clear_patch_cache', 'count_colorings', 'count_conflicts', 'decode_model',
+    'draw_tile_map', 'edge_arrays', 'encode_cnf', 'expand_colormap', 'find_conflicts', 'find_periodic_patch',
+    'floor_plan_edges', 'generate_grid_edges', 'generate_torus_edges', 'grid_edge_arrays', 'grid_reflections',
+    'issafe', 'iter_colorings', 'load_floor_mask', 'load_tiles', 'min_conflicts', 'new_progress',
+    'parse_floor_mask', 'read_png_mask', 'rectangle_cells', 'resolve_region', 'reversal_groups',
+    'reversal_index', 'save_tile_map', 'search_iterative', 'search_stats', 'set_verbosity', 'solve_coloring',
+    'solve_coloring_blocks', 'solve_coloring_parallel', 'solve_periodic', 'solve_sat', 'solve_transfer_matrix',
+    'stamp_patch', 'symmetry_breaking_masks', 'tile_map_image', 'tile_masks', 'write_dimacs',
+    'write_search_stats',
+]
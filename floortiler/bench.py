@@ -0,0 +1,274 @@
+"""
+Reproducible benchmarks of the solvers.
+
+Runs a fixed matrix of floors, catalogues and seeded catalogue shuffles
+through every solving method, solve_coloring()'s as well as the process
+pools of solve_coloring_parallel() and solve_coloring_blocks(), and writes
+the timings and search counters as JSON, which can be compared with a
+saved baseline:
+
+    python -m floortiler.bench --output baseline.json
+    python -m floortiler.bench --baseline baseline.json
+
+Every 'blocks' case is also checked against 'forward_checking' on the same
+floor (see check_blocks()), and the run exits with 1 if the blocks miss a
+layout.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .grid import generate_grid_edges
+from .parallel import solve_coloring_blocks, solve_coloring_parallel
+from .periodic import clear_patch_cache
+from .reporting import new_progress
+from .sat import solve_sat
+from .solver import solve_coloring
+from .tiles import TILES, TILES_24, clear_compatibility_cache
+
+# Plain backtracking and SAT do not finish beyond the example floors for most seeds
+EXAMPLE_METHODS = ('backtrack', 'forward_checking', 'min_conflicts', 'sat', 'periodic')
+LARGE_METHODS = ('forward_checking', 'periodic', 'parallel', 'blocks')
+# The transfer matrix falls back to forward checking once a row has more than
+# MAX_ROW_STATES states, 3 columns for tiles24 and 5 for tiles16, so it only
+# runs on the strips
+STRIP_METHODS = ('forward_checking', 'transfer_matrix', 'periodic')
+# name -> (rows, cols, methods); 8x8 is floortiles.py, 5x7 floortiles-rectangle.py
+SHAPES = {
+    'square-8': (8, 8, EXAMPLE_METHODS),
+    'square-16': (16, 16, LARGE_METHODS + ('min_conflicts',)),
+    'square-32': (32, 32, LARGE_METHODS),
+    'rectangle-5x7': (5, 7, EXAMPLE_METHODS),
+    'rectangle-20x30': (20, 30, LARGE_METHODS),
+    'strip-500x2': (500, 2, STRIP_METHODS),
+    'strip-200x3': (200, 3, STRIP_METHODS),
+    'square-128': (128, 128, ('forward_checking', 'blocks')),
+}
+CATALOGUES = {'tiles16': TILES, 'tiles24': TILES_24}
+SEEDS = (0, 1, 2)
+# Methods that fill in the search counters
+COUNTED_METHODS = ('backtrack', 'forward_checking')
+WORKERS = 2  # worker processes of 'parallel' and 'blocks'
+BLOCK_TILES = (16, 16)  # blocks of 'blocks'
+TOLERANCE = 0.25    # allowed relative slowdown before a case counts as a regression
+MIN_SLOWDOWN = 0.005  # seconds; smaller slowdowns are timer noise
+
+
+def benchmark_cases(quick=False):
+    """
+    The benchmark matrix.
+    
+    Args:
+        quick: Only the shapes of the two example scripts and seed 0
+    
+    Returns:
+        List of case dictionaries with 'id', 'shape', 'rows', 'cols',
+        'catalogue', 'seed' and 'method'
+    """
+    cases = []
+    for shape, (rows, cols, methods) in SHAPES.items():
+        if quick and shape not in ('square-8', 'rectangle-5x7'):
+            continue
+        for catalogue in CATALOGUES:
+            for seed in SEEDS[:1] if quick else SEEDS:
+                for method in methods:
+                    cases.append({
+                        'id': "%s/%s/seed%d/%s" % (shape, catalogue, seed, method),
+                        'shape': shape,
+                        'rows': rows,
+                        'cols': cols,
+                        'catalogue': catalogue,
+                        'seed': seed,
+                        'method': method,
+                    })
+    return cases
+
+
+def run_case(case, repeat=1):
+    """
+    Solve one case and measure it.
+    
+    The catalogue is shuffled with the case's seed, and the compatibility
+    and patch caches are cleared before every run so no run profits from an
+    earlier one. Wall time is the best of repeat runs; peak memory and the
+    search counters are taken from one extra run under tracemalloc, so
+    neither tracing nor counting slows the timed runs. 'sat' always uses
+    the built-in solver. 'parallel' runs WORKERS forward checking restarts
+    with solve_coloring_parallel() and 'blocks' lays BLOCK_TILES blocks with
+    solve_coloring_blocks() on WORKERS processes; their wall time includes
+    starting the pool, and their peak memory only counts this process.
+    
+    Returns:
+        The case dictionary extended with 'solved', 'wall_time' (seconds),
+        'nodes' (tiles placed), 'backtracks' and 'peak_memory' (bytes);
+        the counters are None for methods that do not keep them
+    """
+    rows, cols = case['rows'], case['cols']
+    tiles_list = [list(tile) for tile in CATALOGUES[case['catalogue']]]
+    random.Random(case['seed']).shuffle(tiles_list)
+    edges_dict = generate_grid_edges(rows, cols)
+
+    def solve(progress=None):
+        clear_compatibility_cache()
+        clear_patch_cache()
+        method = case['method']
+        if method == 'sat':
+            return solve_sat(tiles_list, edges_dict, 'python')
+        if method == 'parallel':
+            return solve_coloring_parallel(rows, cols, tiles_list, 'forward_checking', case['seed'], WORKERS, WORKERS)
+        if method == 'blocks':
+            return solve_coloring_blocks(rows, cols, tiles_list, BLOCK_TILES[0], BLOCK_TILES[1], WORKERS)
+        return solve_coloring(rows, cols, tiles_list, edges_dict, method, progress)
+
+    wall_time = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        colormap = solve()
+        elapsed = time.perf_counter() - started
+        wall_time = elapsed if wall_time is None else min(wall_time, elapsed)
+
+    progress = new_progress(rows * cols)
+    tracemalloc.start()
+    try:
+        solve(progress)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    counted = case['method'] in COUNTED_METHODS
+    result = dict(case)
+    result.update({
+        'solved': colormap is not None,
+        'wall_time': round(wall_time, 6),
+        'nodes': progress['placed'] if counted else None,
+        'backtracks': progress['backtracks'] if counted else None,
+        'peak_memory': peak_memory,
+    })
+    return result
+
+
+def run_benchmarks(cases, repeat=1, log=None):
+    """
+    Run every case and collect the results with a description of the machine.
+    
+    Args:
+        cases: Cases from benchmark_cases()
+        repeat: Timed runs per case
+        log: Optional file to write one line per finished case to
+    
+    Returns:
+        Dictionary with 'python', 'platform', 'repeat' and 'results'
+    """
+    results = []
+    for case in cases:
+        result = run_case(case, repeat)
+        results.append(result)
+        if log is not None:
+            print("%-48s %9.4fs nodes %-8s backtracks %-8s peak %d KiB" % (
+                result['id'], result['wall_time'], result['nodes'], result['backtracks'],
+                result['peak_memory'] // 1024), file=log)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    """
+    Compare a benchmark report with a baseline report.
+    
+    A case regresses when it is no longer solved, when it expands more
+    nodes, or when it is more than tolerance slower (and by more than
+    MIN_SLOWDOWN seconds). Cases missing from either report are skipped.
+    
+    Returns:
+        List of (case id, description) pairs, one per regression
+    """
+    before = {result['id']: result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = before.get(result['id'])
+        if old is None:
+            continue
+        if old['solved'] and not result['solved']:
+            regressions.append((result['id'], "no longer solved"))
+        if old['nodes'] is not None and result['nodes'] is not None and result['nodes'] > old['nodes']:
+            regressions.append((result['id'], "nodes %d -> %d" % (old['nodes'], result['nodes'])))
+        slowdown = result['wall_time'] - old['wall_time']
+        if slowdown > MIN_SLOWDOWN and result['wall_time'] > old['wall_time'] * (1 + tolerance):
+            regressions.append((result['id'], "wall time %.4fs -> %.4fs" % (old['wall_time'], result['wall_time'])))
+    return regressions
+
+
+def check_blocks(report):
+    """
+    Compare every 'blocks' case with 'forward_checking' on the same floor.
+    
+    The block solver falls back to a plain search when its blocks fail, so
+    it must lay every floor that forward checking lays.
+    
+    Returns:
+        List of (case id, description, failed) triples, one per 'blocks'
+        case with a forward checking case to compare with; failed is True
+        when forward checking laid the floor and the blocks did not
+    """
+    by_id = {result['id']: result for result in report['results']}
+    checks = []
+    for result in report['results']:
+        if result['method'] != 'blocks':
+            continue
+        other = by_id.get(result['id'][:-len('blocks')] + 'forward_checking')
+        if other is None:
+            continue
+        failed = other['solved'] and not result['solved']
+        description = "%s in %.4fs, forward_checking %s in %.4fs" % (
+            "solved" if result['solved'] else "not solved", result['wall_time'],
+            "solved" if other['solved'] else "not solved", other['wall_time'])
+        checks.append((result['id'], description, failed))
+    return checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="floortiler.bench", description="Benchmark the floortiler solvers.")
+    parser.add_argument("--output", help="write the results as JSON to this file (default: standard output)")
+    parser.add_argument("--baseline", help="JSON results to compare with; exits with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed relative slowdown (default %.2f)" % TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best counts (default 3)")
+    parser.add_argument("--quick", action="store_true", help="only the example floors with seed 0")
+    parser.add_argument("--filter", default="", help="only cases whose id contains this text")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in benchmark_cases(args.quick) if args.filter in case['id']]
+    report = run_benchmarks(cases, args.repeat, log=sys.stderr)
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    elif not args.baseline:
+        print(text)
+
+    mismatches = 0
+    for case_id, description, failed in check_blocks(report):
+        print("%s %s: %s" % ("MISMATCH" if failed else "blocks", case_id, description), file=sys.stderr)
+        mismatches += failed
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for case_id, description in regressions:
+            print("REGRESSION %s: %s" % (case_id, description))
+        print("%d cases, %d regressions" % (len(report['results']), len(regressions)))
+        return 1 if regressions or mismatches else 0
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
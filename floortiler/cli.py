@@ -0,0 +1,209 @@
+"""
+Command-line entry point: solve a floor and save the map.
+
+    python -m floortiler --rows 5 --cols 7 --seed 1 --output tile_map.png
+    python -m floortiler --rows 5 --cols 7 --check layout.json
+    python -m floortiler --rows 5 --cols 7 --resolve layout.json --region 1 3 2 5
+    python -m floortiler --floor room.txt --output room.png
+    python -m floortiler --rows 12 --method sat --cnf floor.cnf
+    python -m floortiler --rows 2000 --method periodic --seed 3 --no-render
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+
+from . import reporting
+from .floorplan import expand_colormap, floor_plan_edges, load_floor_mask
+from .grid import generate_grid_edges, rectangle_cells
+from .local_search import min_conflicts
+from .parallel import solve_coloring_blocks, solve_coloring_parallel
+from .periodic import MAX_PERIOD
+from .render import MAX_IMAGE_PIXELS, draw_tile_map, image_pixels, save_tile_map
+from .reporting import new_progress, write_search_stats
+from .sat import AT_MOST_ONE, SAT_SOLVERS, encode_cnf, solve_sat, write_dimacs
+from .solver import resolve_region, solve_coloring, solve_periodic
+from .tiles import TILES, canonical_catalogue, load_tiles
+from .validate import edge_arrays, find_conflicts, grid_edge_arrays
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="floortiler",
+                                     description="Lay out floor tiles so no two touching bars share a color.")
+    parser.add_argument("--rows", type=int, default=8, help="number of rows (default 8)")
+    parser.add_argument("--cols", type=int, default=None, help="number of columns (default: same as rows)")
+    parser.add_argument("--floor", metavar="MASK",
+                        help="lay only the tiled cells of a floor plan, a text grid ('#' tiled, '.' not) or a PNG "
+                             "(light pixels tiled); sets the rows and columns")
+    parser.add_argument("--tiles", default=None, help="JSON file with the tile catalogue (default: built-in)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="shuffle the catalogue with this seed (default: use it in order)")
+    parser.add_argument("--reversible", action="store_true",
+                        help="tiles may be laid turned around: add every tile's reversal to the catalogue")
+    parser.add_argument("--method", default="forward_checking",
+                        choices=["backtrack", "forward_checking", "transfer_matrix", "min_conflicts", "sat",
+                                 "periodic"])
+    parser.add_argument("--time-budget", type=float, default=10.0,
+                        help="seconds of search for min_conflicts (default 10)")
+    parser.add_argument("--max-period", type=int, default=MAX_PERIOD,
+                        help="largest patch period for the periodic method (default %d)" % MAX_PERIOD)
+    parser.add_argument("--sat-solver", default=None,
+                        help="SAT solver executable for the sat method, 'python' for the built-in one "
+                             "(default: the first installed of %s, else built-in)" % ", ".join(SAT_SOLVERS))
+    parser.add_argument("--at-most-one", default=None, choices=[name for name in AT_MOST_ONE if name],
+                        help="also encode that every cell holds one tile, for the sat method and --cnf")
+    parser.add_argument("--cnf", metavar="FILE",
+                        help="instead of solving, write the floor as DIMACS CNF to FILE")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (backtrack/forward_checking)")
+    parser.add_argument("--first-wins", action="store_true",
+                        help="with --workers, take the first layout found instead of waiting for the earlier "
+                             "tasks; faster, but the layout can change from run to run")
+    parser.add_argument("--blocks", type=int, nargs=2, metavar=("ROWS", "COLS"),
+                        help="lay the floor in blocks of ROWS x COLS tiles, in parallel with --workers "
+                             "(backtrack/forward_checking)")
+    parser.add_argument("--restarts", type=int, default=1, help="shuffled restarts when using workers")
+    parser.add_argument("--output", default="tile_map.png", help="picture to write (default tile_map.png)")
+    parser.add_argument("--no-render", action="store_true", help="do not draw the map")
+    parser.add_argument("--show", action="store_true", help="also open the map in a window")
+    parser.add_argument("--tile-pixels", type=int, default=40,
+                        help="tile size in pixels, a multiple of 4; 4 draws one pixel per bar (default 40)")
+    parser.add_argument("--block", type=int, nargs=2, metavar=("ROWS", "COLS"),
+                        help="write the map as one PNG per block of ROWS x COLS tiles")
+    parser.add_argument("--check", metavar="LAYOUT",
+                        help="instead of solving, check a colormap JSON file and list its conflicts")
+    parser.add_argument("--resolve", metavar="LAYOUT",
+                        help="lay the --region of a colormap JSON file again, keeping all other tiles")
+    parser.add_argument("--region", type=int, nargs=4, metavar=("ROW0", "ROW1", "COL0", "COL1"),
+                        help="rows ROW0 to ROW1 - 1 and columns COL0 to COL1 - 1, for --resolve")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="write the search counters to FILE, as CSV if it ends in .csv and JSON otherwise "
+                             "(backtrack/forward_checking)")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="-v for progress, -vv for a full trace")
+    args = parser.parse_args(argv)
+
+    rows = args.rows
+    cols = args.cols if args.cols is not None else rows
+    reporting.set_verbosity(min(args.verbose, reporting.TRACE))
+
+    tiles = load_tiles(args.tiles) if args.tiles else [list(tile) for tile in TILES]
+    if args.reversible:
+        tiles = canonical_catalogue(tiles, reversible=True)
+    if args.seed is not None:
+        random.Random(args.seed).shuffle(tiles)
+
+    if (args.blocks or args.workers > 1) and args.method not in ("backtrack", "forward_checking"):
+        parser.error("--blocks and --workers only work with --method backtrack or forward_checking")
+
+    floor_edges = None
+    if args.floor:
+        if args.resolve or args.blocks or args.workers > 1:
+            parser.error("--floor cannot be combined with --resolve, --blocks or --workers")
+        floor_edges = floor_plan_edges(load_floor_mask(args.floor))
+        rows, cols = floor_edges['shape']
+
+    if args.check:
+        return check_layout(args.check, rows, cols, floor_edges)
+
+    if not args.no_render:
+        # Refuse before solving rather than run out of memory drawing the map
+        picture_rows, picture_cols = rows, cols
+        if args.block and not args.show:
+            picture_rows, picture_cols = min(args.block[0], rows), min(args.block[1], cols)
+        if image_pixels(picture_rows, picture_cols, args.tile_pixels) > MAX_IMAGE_PIXELS:
+            parser.error("a map of %d x %d tiles at --tile-pixels %d is too large to draw; "
+                         "pass --block ROWS COLS to write it in pieces, --tile-pixels 4 for an overview, "
+                         "or --no-render" % (picture_rows, picture_cols, args.tile_pixels))
+
+    if args.cnf:
+        edges = floor_edges if floor_edges is not None else generate_grid_edges(rows, cols)
+        tiles = canonical_catalogue(tiles)
+        num_vars, clauses = encode_cnf(tiles, edges, args.at_most_one)
+        write_dimacs(args.cnf, num_vars, clauses, ["variable v * %d + i + 1: cell v holds tile %s"
+                                                   % (len(tiles), json.dumps(tiles))])
+        print("Wrote %d variables and %d clauses to %s" % (num_vars, len(clauses), args.cnf), file=sys.stderr)
+        return 0
+
+    # The solvers report progress on stdout; keep it for the colormap
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.resolve:
+            if not args.region:
+                parser.error("--resolve needs --region")
+            with open(args.resolve) as f:
+                layout = json.load(f)
+            edges = generate_grid_edges(rows, cols)
+            cells = rectangle_cells(cols, args.region[:2], args.region[2:])
+            method = args.method if args.method == 'backtrack' else 'forward_checking'
+            colormap = resolve_region(layout, tiles, edges, cells, method)
+        elif args.method == 'min_conflicts':
+            edges = floor_edges if floor_edges is not None else generate_grid_edges(rows, cols)
+            colormap, conflicts = min_conflicts(rows, cols, tiles, edges, args.time_budget, args.seed or 0)
+            if conflicts:
+                print("No layout found, the best one has %d conflicts" % conflicts, file=sys.stderr)
+                return 1
+        elif args.method == 'sat':
+            edges = floor_edges if floor_edges is not None else generate_grid_edges(rows, cols)
+            colormap = solve_sat(tiles, edges, args.sat_solver, args.at_most_one)
+            if colormap is None:
+                print("No layout exists", file=sys.stderr)
+                return 1
+        elif args.method == 'periodic':
+            colormap = solve_periodic(rows, cols, tiles, floor_edges, args.max_period, seed=args.seed)
+        elif args.blocks:
+            colormap = solve_coloring_blocks(rows, cols, tiles, args.blocks[0], args.blocks[1], args.workers,
+                                             method=args.method)
+        elif args.workers > 1:
+            colormap = solve_coloring_parallel(rows, cols, tiles, args.method, args.seed or 0,
+                                               args.restarts, args.workers, args.first_wins)
+        else:
+            edges = floor_edges if floor_edges is not None else generate_grid_edges(rows, cols)
+            progress = new_progress(len(edges['neighbors'])) if args.stats else None
+            colormap = solve_coloring(rows, cols, tiles, edges, method=args.method, progress=progress)
+            if progress is not None:
+                write_search_stats(progress, args.stats)
+
+    if colormap is None:
+        print("No layout found", file=sys.stderr)
+        return 1
+    if floor_edges is not None:
+        colormap = expand_colormap(colormap, floor_edges)
+    print(json.dumps(colormap))
+    if not args.no_render:
+        if args.block:
+            save_tile_map(colormap, rows, cols, args.output, args.tile_pixels, tuple(args.block))
+            path = None
+        else:
+            path = args.output
+        draw_tile_map(colormap, rows, cols, path=path, show=args.show, tile_pixels=args.tile_pixels)
+    return 0
+
+
+def check_layout(path, rows, cols, floor_edges=None):
+    """
+    Print the conflicting edges of a saved colormap; returns 1 if there are any.
+    
+    With the floor_edges of a floor plan only its tiled cells are checked;
+    the colormap covers the whole rectangle, as the CLI prints it.
+    """
+    with open(path) as f:
+        colormap = json.load(f)
+    if len(colormap) != rows * cols:
+        print("%s has %d tiles, expected %d for %dx%d" % (path, len(colormap), rows * cols, rows, cols),
+              file=sys.stderr)
+        return 2
+    if floor_edges is None:
+        cells = range(rows * cols)
+        conflicts = find_conflicts(colormap, grid_edge_arrays(rows, cols))
+    else:
+        cells = floor_edges['cells']
+        conflicts = find_conflicts([colormap[cell] for cell in cells], edge_arrays(floor_edges))
+    count = 0
+    for relation, edges in conflicts.items():
+        for vertex, neighbor in edges.tolist():
+            vertex, neighbor = cells[vertex], cells[neighbor]
+            print("conflict %s: (%d, %d) %s -> (%d, %d) %s" % (
+                relation, vertex // cols, vertex % cols, colormap[vertex],
+                neighbor // cols, neighbor % cols, colormap[neighbor]))
+            count += 1
+    print("%d conflicts" % count, file=sys.stderr)
+    return 1 if count else 0
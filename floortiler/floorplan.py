@@ -0,0 +1,239 @@
+"""
+Irregular floors: rooms given as an occupancy mask of the rectangle around them.
+
+Only the tiled cells of the mask become vertices, numbered in row-major
+order, so search time and memory follow the tiles actually laid and not
+the rectangle. The checkerboard stays anchored to the rectangle: the cell
+in row r and column c is vertical when r + c is odd, as in
+generate_grid_edges(), whether or not cell (0, 0) is tiled.
+"""
+import struct
+import zlib
+from array import array
+
+from .grid import RELATIONS
+
+# Characters of a text mask that mark a cell without a tile; any other character is tiled
+EMPTY_CELLS = ". 0"
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Channels per pixel of each PNG color type
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def parse_floor_mask(text):
+    """
+    Read an occupancy mask drawn as text, one line per row of the floor.
+    
+    '.', '0' and spaces are cells without a tile, any other character
+    (e.g. '#') is tiled. Short lines are padded with empty cells, and blank
+    lines at the end are ignored.
+    
+    Returns:
+        List of rows, each a list of booleans, True where a tile is laid
+    """
+    lines = text.rstrip().splitlines()
+    cols = max((len(line) for line in lines), default=0)
+    return [[char not in EMPTY_CELLS for char in line.ljust(cols)] for line in lines]
+
+
+def read_png_mask(path):
+    """
+    Read an occupancy mask from a PNG file, one pixel per cell.
+    
+    Light pixels (luminance 128 or more) are tiled, dark or transparent
+    ones are not. Gray, RGB, palette and alpha images with 8 bits per sample
+    are read, and gray and palette images with 1, 2 or 4 bits; interlaced
+    and 16-bit images are not.
+    
+    Returns:
+        List of rows, each a list of booleans, True where a tile is laid
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("%s is not a PNG file" % (path,))
+    header = None
+    palette = []
+    transparency = b''
+    compressed = []
+    pos = 8
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += length + 12  # length, type, data and CRC
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'PLTE':
+            palette = [tuple(body[index:index + 3]) for index in range(0, len(body), 3)]
+        elif kind == b'tRNS':
+            transparency = body
+        elif kind == b'IDAT':
+            compressed.append(body)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        raise ValueError("%s has no PNG header" % (path,))
+    width, height, depth, color_type, _, _, interlace = header
+    channels = _PNG_CHANNELS.get(color_type)
+    if channels is None or interlace or depth == 16 or (depth < 8 and color_type not in (0, 3)):
+        raise ValueError("Unsupported PNG format in %s: %d-bit color type %d%s"
+                         % (path, depth, color_type, ", interlaced" if interlace else ""))
+
+    raw = zlib.decompress(b''.join(compressed))
+    stride = (width * depth * channels + 7) // 8
+    step = max(1, depth * channels // 8)  # bytes per pixel, as the filters count them
+    gray_scale = 255 // ((1 << depth) - 1)
+    previous = bytearray(stride)
+    mask = []
+    pos = 0
+    for _ in range(height):
+        filter_type = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += stride + 1
+        _unfilter(line, previous, filter_type, step)
+        previous = line
+
+        if depth < 8:
+            per_byte = 8 // depth
+            samples = [line[index // per_byte] >> (8 - depth * (index % per_byte + 1)) & ((1 << depth) - 1)
+                       for index in range(width)]
+        else:
+            samples = line
+        row = []
+        for x in range(width):
+            alpha = 255
+            if color_type == 0:
+                red = green = blue = samples[x] * gray_scale
+            elif color_type == 3:
+                red, green, blue = palette[samples[x]]
+                if samples[x] < len(transparency):
+                    alpha = transparency[samples[x]]
+            else:
+                pixel = samples[x * channels:(x + 1) * channels]
+                if color_type == 4:
+                    red = green = blue = pixel[0]
+                    alpha = pixel[1]
+                else:
+                    red, green, blue = pixel[:3]
+                    if color_type == 6:
+                        alpha = pixel[3]
+            row.append(alpha >= 128 and 299 * red + 587 * green + 114 * blue >= 128000)
+        mask.append(row)
+    return mask
+
+
+def _unfilter(line, previous, filter_type, step):
+    # Undo a PNG scanline filter in place; previous is the unfiltered line above
+    if filter_type == 0:
+        return
+    for index in range(len(line)):
+        left = line[index - step] if index >= step else 0
+        up = previous[index]
+        if filter_type == 1:
+            line[index] = (line[index] + left) & 0xff
+        elif filter_type == 2:
+            line[index] = (line[index] + up) & 0xff
+        elif filter_type == 3:
+            line[index] = (line[index] + (left + up) // 2) & 0xff
+        elif filter_type == 4:
+            up_left = previous[index - step] if index >= step else 0
+            estimate = left + up - up_left
+            distances = (abs(estimate - left), abs(estimate - up), abs(estimate - up_left))
+            if distances[0] <= distances[1] and distances[0] <= distances[2]:
+                predictor = left
+            elif distances[1] <= distances[2]:
+                predictor = up
+            else:
+                predictor = up_left
+            line[index] = (line[index] + predictor) & 0xff
+        else:
+            raise ValueError("Unknown PNG filter type %d" % (filter_type,))
+
+
+def load_floor_mask(path):
+    """
+    Load an occupancy mask from a PNG file or a text file (see parse_floor_mask()).
+    """
+    with open(path, 'rb') as f:
+        is_png = f.read(8) == PNG_SIGNATURE
+    if is_png:
+        return read_png_mask(path)
+    with open(path) as f:
+        return parse_floor_mask(f.read())
+
+
+def floor_plan_edges(mask):
+    """
+    Generate the edges of the tiled cells of an occupancy mask.
+    
+    The edge lists are compact int32 arrays holding the [vertex, neighbor]
+    pairs one after the other; vertices are the tiled cells in row-major
+    order, and cells without a tile get no vertex and no edges. The
+    solvers take the dictionary in place of one from generate_grid_edges(),
+    with len(edges_dict['neighbors']) tiles instead of rows * cols.
+    
+    Args:
+        mask: List of rows (or a 2-D array) of booleans, True where a tile is laid
+    
+    Returns:
+        Dictionary with an array('i') per relation, 'neighbors' (a tuple of
+        (neighbor, relation) pairs per vertex), 'cells' (the cell
+        row * cols + col of every vertex, an array('i')) and 'shape', the
+        (rows, cols) of the mask
+    """
+    rows = len(mask)
+    cols = max((len(line) for line in mask), default=0)
+    vertex_of = array('i', [-1]) * (rows * cols)
+    cells = array('i')
+    for row, line in enumerate(mask):
+        for col, tiled in enumerate(line):
+            if tiled:
+                vertex_of[row * cols + col] = len(cells)
+                cells.append(row * cols + col)
+
+    edges_dict = {relation: array('i') for relation in RELATIONS}
+    neighbors = []
+    for vertex, cell in enumerate(cells):
+        row, col = divmod(cell, cols)
+        is_vertical = (row + col) % 2 == 1  # Cell (0, 0) is horizontal
+        # (neighbor exists, offset, relation for vertical tiles, relation for horizontal tiles)
+        directions = (
+            (col + 1 < cols, 1, 'last_to_all', 'all_to_first'),
+            (col >= 1, -1, 'first_to_all', 'all_to_last'),
+            (row >= 1, -cols, 'all_to_last', 'first_to_all'),
+            (row + 1 < rows, cols, 'all_to_first', 'last_to_all'),
+        )
+        entries = []
+        for exists, offset, vertical_relation, horizontal_relation in directions:
+            if not exists:
+                continue
+            neighbor = vertex_of[cell + offset]
+            if neighbor < 0:
+                continue
+            relation = vertical_relation if is_vertical else horizontal_relation
+            edges_dict[relation].extend((vertex, neighbor))
+            entries.append((neighbor, relation))
+        neighbors.append(tuple(entries))
+    edges_dict['neighbors'] = neighbors
+    edges_dict['cells'] = cells
+    edges_dict['shape'] = (rows, cols)
+    return edges_dict
+
+
+def expand_colormap(colormap, edges_dict):
+    """
+    Spread the colormap of a floor plan over its whole rectangle.
+    
+    Args:
+        colormap: One tile per vertex, as solved with floor_plan_edges()
+        edges_dict: Edge dictionary from floor_plan_edges()
+    
+    Returns:
+        Colormap of rows * cols cells, 0 where no tile is laid, for
+        draw_tile_map() and the other functions of full floors
+    """
+    rows, cols = edges_dict['shape']
+    full = [0] * (rows * cols)
+    for vertex, cell in enumerate(edges_dict['cells']):
+        full[cell] = colormap[vertex]
+    return full
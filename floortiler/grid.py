@@ -0,0 +1,225 @@
+"""
+Grid adjacency for floors where tiles alternate horizontal/vertical.
+"""
+from . import reporting
+from .reporting import TRACE
+
+# Edge relations produced by generate_grid_edges()
+RELATIONS = ('all_to_first', 'first_to_all', 'all_to_last', 'last_to_all')
+
+
+def generate_grid_edges(rows, cols=None):
+    """
+    Generate edges for a rows-by-cols grid where tiles alternate vertical/horizontal.
+    Tile 0 is horizontal, then tiles alternate in a checkerboard pattern.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid, defaults to rows (square floor)
+    
+    Returns:
+        Dictionary with four edge lists:
+        - 'all_to_first': All 4 bars of tile1 touch first bar of tile2
+        - 'first_to_all': First bar of tile1 touches all 4 bars of tile2
+        - 'all_to_last': All 4 bars of tile1 touch last bar of tile2
+        - 'last_to_all': Last bar of tile1 touches all 4 bars of tile2
+        plus 'neighbors', a per-vertex tuple of (neighbor, relation) pairs
+    """
+    if cols is None:
+        cols = rows
+    all_to_first = []  # All 4 bars touch first bar
+    first_to_all = []  # First bar touches all 4 bars
+    all_to_last = []   # All 4 bars touch last bar
+    last_to_all = []   # Last bar touches all 4 bars
+    
+    for row in range(rows):
+        for col in range(cols):
+            node = row * cols + col
+            is_vertical = (row + col) % 2 == 1  # Tile 0 is horizontal
+            
+            if is_vertical:
+                # Vertical tile (bars run vertically)
+                
+                # Right neighbor (horizontal tile)
+                if col + 1 < cols:
+                    neighbor = node + 1
+                    # Last bar of vertical touches all bars of horizontal (to the right)
+                    last_to_all.append([node, neighbor])
+                
+                # Left neighbor (horizontal tile)
+                if col - 1 >= 0:
+                    neighbor = node - 1
+                    # First bar of vertical touches all bars of horizontal (to the left)
+                    first_to_all.append([node, neighbor])
+                
+                # Top neighbor (horizontal tile)
+                if row - 1 >= 0:
+                    neighbor = node - cols
+                    # All bars of vertical touch last bar of horizontal (above)
+                    all_to_last.append([node, neighbor])
+                
+                # Bottom neighbor (horizontal tile)
+                if row + 1 < rows:
+                    neighbor = node + cols
+                    # All bars of vertical touch first bar of horizontal (below)
+                    all_to_first.append([node, neighbor])
+                    
+            else:
+                # Horizontal tile (bars run horizontally)
+                
+                # Right neighbor (vertical tile)
+                if col + 1 < cols:
+                    neighbor = node + 1
+                    # All bars of horizontal touch first bar of vertical (to the right)
+                    all_to_first.append([node, neighbor])
+                
+                # Left neighbor (vertical tile)
+                if col - 1 >= 0:
+                    neighbor = node - 1
+                    # All bars of horizontal touch last bar of vertical (to the left)
+                    all_to_last.append([node, neighbor])
+                
+                # Top neighbor (vertical tile)
+                if row - 1 >= 0:
+                    neighbor = node - cols
+                    # Last bar of horizontal touches all bars of vertical (above)
+                    first_to_all.append([node, neighbor])
+                
+                # Bottom neighbor (vertical tile)
+                if row + 1 < rows:
+                    neighbor = node + cols
+                    # First bar of horizontal touches all bars of vertical (below)
+                    last_to_all.append([node, neighbor])
+    if reporting.VERBOSITY >= TRACE:
+        print("all_to_first:", all_to_first)
+        print("first_to_all:", first_to_all)
+        print("all_to_last:", all_to_last)
+        print("last_to_all:", last_to_all)
+    edges_dict = {
+        'all_to_first': all_to_first,
+        'first_to_all': first_to_all,
+        'all_to_last': all_to_last,
+        'last_to_all': last_to_all
+    }
+    edges_dict['neighbors'] = build_neighbor_index(edges_dict, rows * cols)
+    return edges_dict
+
+
+def generate_torus_edges(rows, cols):
+    """
+    Generate the edges of a rows-by-cols grid whose opposite borders touch.
+    
+    Every tile has four neighbours, wrapping around at the borders, with
+    the same relations as in generate_grid_edges(). Both periods must be
+    even so the checkerboard of horizontal and vertical tiles continues
+    across the wrap. With a period of 2 a tile meets the same neighbour on
+    both sides, once with each relation.
+    
+    Returns:
+        Dictionary with the four edge lists and 'neighbors', as from
+        generate_grid_edges()
+    """
+    if rows % 2 or cols % 2:
+        raise ValueError("Torus periods must be even, got %dx%d" % (rows, cols))
+    edges_dict = {relation: [] for relation in RELATIONS}
+    for row in range(rows):
+        for col in range(cols):
+            node = row * cols + col
+            is_vertical = (row + col) % 2 == 1  # Tile 0 is horizontal
+            # (neighbor, relation for vertical tiles, relation for horizontal tiles)
+            directions = (
+                (row * cols + (col + 1) % cols, 'last_to_all', 'all_to_first'),
+                (row * cols + (col - 1) % cols, 'first_to_all', 'all_to_last'),
+                ((row - 1) % rows * cols + col, 'all_to_last', 'first_to_all'),
+                ((row + 1) % rows * cols + col, 'all_to_first', 'last_to_all'),
+            )
+            for neighbor, vertical_relation, horizontal_relation in directions:
+                relation = vertical_relation if is_vertical else horizontal_relation
+                edges_dict[relation].append([node, neighbor])
+    edges_dict['neighbors'] = build_neighbor_index(edges_dict, rows * cols)
+    return edges_dict
+
+
+def grid_reflections(rows, cols):
+    """
+    Reflections of the floor that keep the horizontal/vertical checkerboard.
+    
+    A reflection turns the tiles of one orientation around (reverses their
+    bars), so it only maps layouts to layouts when the catalogue holds the
+    reversal of every tile. Mirroring left-right needs an odd number of
+    columns and turns the vertical tiles, mirroring top-bottom needs an odd
+    number of rows and turns the horizontal tiles, and the half turn needs
+    rows + cols to be even and turns every tile.
+    
+    Returns:
+        List of (vertex, turned) pairs, one per reflection: the vertex that
+        vertex 0 is mapped to, and whether the tile there is turned around
+    """
+    reflections = []
+    if cols % 2:
+        reflections.append((cols - 1, False))
+    if rows % 2:
+        reflections.append(((rows - 1) * cols, True))
+    if (rows + cols) % 2 == 0:
+        reflections.append((rows * cols - 1, True))
+    return reflections
+
+
+def rectangle_cells(cols, row_range, col_range):
+    """
+    Vertices of a rectangle of the floor, in row-major order.
+    
+    Args:
+        cols: Number of columns in the grid
+        row_range: (start, stop) rows of the rectangle
+        col_range: (start, stop) columns of the rectangle
+    
+    Returns:
+        List of vertex numbers
+    """
+    return [row * cols + col for row in range(*row_range) for col in range(*col_range)]
+
+
+def build_neighbor_index(edges_dict, num_tiles):
+    """
+    Build a per-vertex adjacency index from the four edge lists.
+    
+    Args:
+        edges_dict: Dictionary with keys 'all_to_first', 'first_to_all', 'all_to_last', 'last_to_all'
+        num_tiles: Number of vertices in the grid
+    
+    Returns:
+        List with one tuple per vertex of (neighbor, relation) pairs
+    """
+    neighbors = [[] for _ in range(num_tiles)]
+    for relation in RELATIONS:
+        for edge in edges_dict[relation]:
+            neighbors[edge[0]].append((edge[1], relation))
+    return [tuple(entries) for entries in neighbors]
+
+
+def grid_row_relations(rows, cols, edges_dict):
+    """
+    Relations inside and between rows, read from the edges of rows 0 to 2.
+    
+    The relations only depend on the column and on the parity of the row,
+    so these rows are enough to describe the whole floor.
+    
+    Returns:
+        (left_relations, up_relations): left_relations[parity][col] is the
+        relation of the edge from (row, col) to (row, col - 1), and
+        up_relations[parity][col] the one from (row, col) to (row - 1, col);
+        None where there is no such edge
+    """
+    neighbors = edges_dict['neighbors']
+    left_relations = [[None] * cols, [None] * cols]
+    up_relations = [[None] * cols, [None] * cols]
+    for row in range(min(rows, 3)):
+        for col in range(cols):
+            node = row * cols + col
+            relation_to = dict(neighbors[node])
+            if col > 0:
+                left_relations[row % 2][col] = relation_to[node - 1]
+            if row > 0:
+                up_relations[row % 2][col] = relation_to[node - cols]
+    return left_relations, up_relations
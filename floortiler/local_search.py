@@ -0,0 +1,238 @@
+"""
+Min-conflicts local search for floors too big for complete search.
+
+Every tile is placed from the start, conflicts and all, and single tiles
+are then swapped until no touching bars share a color or time runs out.
+"""
+import random
+import time
+
+from . import reporting
+from .reporting import PROGRESS, PROGRESS_INTERVAL
+from .tiles import build_compatibility_tables, canonical_catalogue
+
+TIME_CHECK_INTERVAL = 1024  # moves between checks of the clock
+
+
+def min_conflicts(rows, cols, tiles_list, edges_dict, time_budget=10.0, seed=0, start='greedy', tabu_tenure=10,
+                  restart_after=None, max_steps=None):
+    """
+    Search for a layout with as few conflicting edges as possible.
+    
+    Every vertex keeps a count of the conflicting edges it is on, and the
+    vertices are kept in buckets by that count. Each move picks a vertex
+    with a probability proportional to its count, so the worst vertices
+    are picked most often, and gives it the tile with the fewest conflicts
+    there. Going back to a tile the vertex left less than tabu_tenure moves
+    ago is not allowed, unless it gives a new best. A move only updates the
+    counts of the vertex and its neighbours, so it costs O(degree) however
+    big the floor is. After restart_after moves without
+    a new best in the current run, the search starts over from a new start
+    layout; the best layout of all runs is returned.
+    
+    time_budget also bounds building the start layout: when it runs out
+    there, the rest of the floor gets random tiles (or the best layout of
+    an earlier run is returned). Only the one pass that counts the
+    conflicts of the start layout may go beyond it.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges() or floor_plan_edges()
+        time_budget: Seconds to search before giving up
+        seed: Seed for the random choices
+        start: 'greedy' to place tiles row by row avoiding the placed
+            neighbours, or 'random'
+        tabu_tenure: Moves during which a vertex may not take back its old tile
+        restart_after: Moves without a new best before starting over, by
+            default 100 per vertex
+        max_steps: Optional limit on the number of moves
+    
+    Returns:
+        (colormap, conflicts): the best colormap found and its number of
+        conflicting edges, 0 for a valid layout
+    """
+    if start not in ('greedy', 'random'):
+        raise ValueError("Unknown start layout: %r" % (start,))
+    tiles_list = canonical_catalogue(tiles_list)
+    num_tiles = len(edges_dict['neighbors'])
+    num_candidates = len(tiles_list)
+    every_candidate = (1 << num_candidates) - 1
+    # tables[relation][tile at u] are the tiles allowed at v, for (u, relation) in neighbors[v]
+    tables = build_compatibility_tables(tiles_list)
+    neighbors = edges_dict['neighbors']
+    max_degree = max((len(entries) for entries in neighbors), default=0)
+    rng = random.Random(seed)
+    if restart_after is None:
+        restart_after = 100 * num_tiles
+    report = reporting.VERBOSITY >= PROGRESS
+    started = time.perf_counter()
+    deadline = started + time_budget
+
+    bits_of = {}  # bitset -> tuple of its set bits
+
+    def bits(mask):
+        found = bits_of.get(mask)
+        if found is None:
+            found = tuple(index for index in range(num_candidates) if mask >> index & 1)
+            bits_of[mask] = found
+        return found
+
+    def start_layout():
+        # Returns the layout and whether it was finished before the deadline
+        if start == 'random':
+            return [rng.randrange(num_candidates) for _ in range(num_tiles)], True
+        tile = [0] * num_tiles
+        for v in range(num_tiles):
+            if not v % TIME_CHECK_INTERVAL and time.perf_counter() >= deadline:
+                tile[v:] = [rng.randrange(num_candidates) for _ in range(num_tiles - v)]
+                return tile, False
+            allowed = every_candidate
+            for u, relation in neighbors[v]:
+                if u < v:
+                    allowed &= tables[relation][tile[u]]
+            if not allowed:
+                # Nothing fits every placed neighbour: take the least bad tile
+                counts = [0] * num_candidates
+                for u, relation in neighbors[v]:
+                    if u < v:
+                        for index in bits(every_candidate & ~tables[relation][tile[u]]):
+                            counts[index] += 1
+                fewest = min(counts)
+                allowed = sum(1 << index for index in range(num_candidates) if counts[index] == fewest)
+            tile[v] = rng.choice(bits(allowed))
+        return tile, True
+
+    best = None
+    best_tile = None
+    step = 0
+    next_report = started + PROGRESS_INTERVAL
+    while best != 0:
+        tile, finished = start_layout()
+        if not finished and best_tile is not None:
+            break  # out of time before this run could beat the earlier ones
+
+        # buckets[k] holds the vertices with k conflicts, position[v] is v's place in its bucket
+        buckets = [[] for _ in range(max_degree + 1)]
+        position = [0] * num_tiles
+        conflicts = [0] * num_tiles
+        total = 0
+        for v in range(num_tiles):
+            own = tile[v]
+            count = 0
+            for u, relation in neighbors[v]:
+                if not tables[relation][tile[u]] >> own & 1:
+                    count += 1
+            if count:
+                conflicts[v] = count
+                total += count
+                bucket = buckets[count]
+                position[v] = len(bucket)
+                bucket.append(v)
+        total //= 2  # every conflicting edge was counted from both ends
+
+        def set_conflicts(v, count):
+            old = conflicts[v]
+            if old:
+                bucket = buckets[old]
+                last = bucket.pop()
+                if last != v:
+                    bucket[position[v]] = last
+                    position[last] = position[v]
+            if count:
+                bucket = buckets[count]
+                position[v] = len(bucket)
+                bucket.append(v)
+            conflicts[v] = count
+
+        tabu = {}  # v * num_candidates + tile -> first step the tile may come back
+        run_best = total
+        run_best_step = step
+        unsaved = True  # the current layout is a best that has not been copied yet
+        if best is None or total < best:
+            best = total
+        else:
+            unsaved = False
+
+        while total:
+            if step - run_best_step >= restart_after or (max_steps is not None and step >= max_steps):
+                break
+            if not step % TIME_CHECK_INTERVAL:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                tabu = {key: until for key, until in tabu.items() if until > step}
+                if report and now >= next_report:
+                    print("Step", step, "conflicts", total, "best", best)
+                    next_report = now + PROGRESS_INTERVAL
+            step += 1
+
+            # Pick a conflicting edge at random and take one of its ends, so
+            # vertices are picked in proportion to their number of conflicts
+            pick = rng.randrange(2 * total)
+            level = 1
+            while pick >= level * len(buckets[level]):
+                pick -= level * len(buckets[level])
+                level += 1
+            v = buckets[level][pick // level]
+            own = tile[v]
+            counts = [0] * num_candidates
+            for u, relation in neighbors[v]:
+                for index in bits(every_candidate & ~tables[relation][tile[u]]):
+                    counts[index] += 1
+
+            # Least conflicting tile other than the current one, skipping tabu tiles
+            # unless they give a new best
+            fewest = None
+            choices = []
+            base = total - conflicts[v]
+            key = v * num_candidates
+            for index in range(num_candidates):
+                if index == own:
+                    continue
+                count = counts[index]
+                if fewest is not None and count > fewest:
+                    continue
+                if tabu.get(key + index, 0) > step and base + count >= best:
+                    continue
+                if fewest is None or count < fewest:
+                    fewest = count
+                    choices = [index]
+                else:
+                    choices.append(index)
+            if not choices:
+                continue
+            new = rng.choice(choices) if len(choices) > 1 else choices[0]
+
+            if unsaved and base + fewest > total:
+                best_tile = list(tile)  # about to leave the best layout
+                unsaved = False
+            tabu[key + own] = step + tabu_tenure
+            tile[v] = new
+            for u, relation in neighbors[v]:
+                allowed = tables[relation][tile[u]]
+                was = not allowed >> own & 1
+                now_conflicting = not allowed >> new & 1
+                if was != now_conflicting:
+                    set_conflicts(u, conflicts[u] + (1 if now_conflicting else -1))
+            set_conflicts(v, fewest)
+            total = base + fewest
+
+            if total < run_best:
+                run_best = total
+                run_best_step = step
+                if total < best:
+                    best = total
+                    unsaved = True
+
+        if unsaved:
+            best_tile = list(tile)
+        if total and (time.perf_counter() >= deadline or (max_steps is not None and step >= max_steps)):
+            break
+        if report and total:
+            print("No new best for", restart_after, "moves, restarting with best", best)
+
+    if report:
+        print("Min-conflicts finished after", step, "moves with", best, "conflicts")
+    return [tiles_list[index] for index in best_tile], best
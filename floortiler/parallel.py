@@ -0,0 +1,307 @@
+"""
+Solving on a pool of worker processes: multi-start search and block decomposition.
+"""
+import itertools
+import multiprocessing
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import reporting
+from .grid import generate_grid_edges, rectangle_cells
+from .reporting import PROGRESS
+from .solver import (STOP_CHECK_INTERVAL, backtrack_forward_checking, backtrack_iterative, resolve_region,
+                     solve_coloring, symmetry_breaking_masks)
+from .tiles import canonical_catalogue
+
+BLOCK_STEPS_PER_TILE = 8  # search steps per cell before a block (or a widened one) is given up
+
+
+def solve_coloring_parallel(rows, cols, tiles_list, method='backtrack', seed=0, restarts=1, max_workers=None,
+                            first_wins=False):
+    """
+    Solve the tile coloring problem on a pool of worker processes.
+    
+    Restart 0 uses tiles_list as given, every further restart uses a copy
+    shuffled with a seed drawn from seed. With method 'backtrack' every
+    restart is split into one task per tile at vertex 0. Tasks are numbered
+    in that order. A solved task stops all later tasks, and the earliest
+    solved task wins, so the result only depends on the arguments and not
+    on which worker finishes first. The call therefore waits for every
+    earlier task, however slow; with first_wins the first task to solve
+    the floor stops all the others instead, and the layout returned may
+    depend on the timing of the workers. Duplicate tiles are dropped before
+    shuffling, and 'backtrack' tasks skip layouts that are reflections of
+    others as solve_coloring() does.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        method: 'backtrack' or 'forward_checking'
+        seed: Seed for the shuffled restarts
+        restarts: Number of catalogue orders to try
+        max_workers: Number of worker processes, defaults to the CPU count
+        first_wins: Return the first layout found rather than the one of the
+            earliest task, trading reproducibility for speed
+    
+    Returns:
+        colormap if solution found, None otherwise
+    """
+    if method not in ('backtrack', 'forward_checking'):
+        raise ValueError("Unknown solver method: %r" % (method,))
+
+    tiles_list = canonical_catalogue(tiles_list)
+    rng = random.Random(seed)
+    catalogues = [list(tiles_list)]
+    for _ in range(1, restarts):
+        catalogue = list(tiles_list)
+        random.Random(rng.getrandbits(64)).shuffle(catalogue)
+        catalogues.append(catalogue)
+
+    tasks = []  # (catalogue, tile index at vertex 0 or None)
+    for catalogue in catalogues:
+        if method == 'backtrack':
+            tasks += [(catalogue, root) for root in range(len(catalogue))]
+        else:
+            tasks.append((catalogue, None))
+
+    # Index of the earliest solved task so far, shared with the workers;
+    # the tasks numbered above it stop, so -1 (first_wins) stops them all
+    best = multiprocessing.Value('q', len(tasks))
+    solutions = {}
+    initargs = ((rows, cols), method, best, reporting.VERBOSITY, sys.stdout is sys.stderr)
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=initargs) as executor:
+        futures = {}
+        for task_index, (catalogue, root) in enumerate(tasks):
+            futures[executor.submit(_solve_task, task_index, catalogue, root)] = task_index
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            task_index = futures[future]
+            colormap = future.result()
+            if colormap is not None and task_index < best.value:
+                best.value = -1 if first_wins else task_index
+                solutions[task_index] = colormap
+                if reporting.VERBOSITY >= PROGRESS:
+                    print("Task", task_index, "of", len(tasks), "found a solution")
+                for other, other_index in futures.items():
+                    if other_index > best.value:
+                        other.cancel()
+            # Done once every task that could still beat the best one has finished
+            if all(other.done() for other, other_index in futures.items() if other_index < best.value):
+                break
+
+    if solutions:
+        return solutions[min(solutions)]
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Could not solve colormap")
+    return None
+
+
+_worker_state = {}
+
+
+def _init_output(verbosity, to_stderr):
+    # Report like the parent process: at its verbosity, and on stderr if it
+    # sends its stdout there (the CLI does, to keep stdout for the colormap)
+    reporting.set_verbosity(verbosity)
+    if to_stderr:
+        sys.stdout = sys.stderr
+
+
+def _init_worker(dims, method, best, verbosity, to_stderr):
+    _init_output(verbosity, to_stderr)
+    _worker_state['dims'] = dims
+    _worker_state['edges'] = generate_grid_edges(*dims)
+    _worker_state['num_tiles'] = dims[0] * dims[1]
+    _worker_state['method'] = method
+    _worker_state['best'] = best
+
+
+def _solve_task(task_index, catalogue, root):
+    best = _worker_state['best']
+    if best.value < task_index:
+        return None
+
+    def should_stop():
+        return best.value < task_index
+
+    num_tiles = _worker_state['num_tiles']
+    edges_dict = _worker_state['edges']
+    colormap = [0] * num_tiles
+    if _worker_state['method'] == 'forward_checking':
+        solved = backtrack_forward_checking(num_tiles, catalogue, edges_dict, colormap, True, None, should_stop)
+    else:
+        masks = symmetry_breaking_masks(*_worker_state['dims'], catalogue, root)
+        if masks is None:
+            return None
+        colormap[0] = catalogue[root]
+        solved = backtrack_iterative(num_tiles, catalogue, edges_dict, colormap, 1, None, should_stop, masks)
+    return colormap if solved else None
+
+
+def solve_coloring_blocks(rows, cols, tiles_list, block_rows=32, block_cols=32, max_workers=None, retries=3,
+                          method='forward_checking'):
+    """
+    Solve a large floor block by block, laying independent blocks in parallel.
+    
+    The floor is cut into blocks of block_rows x block_cols tiles, which are
+    laid in waves along the anti-diagonals: block (i, j) is laid in wave
+    i + j, with the blocks above and to its left already laid. The blocks of
+    one wave do not touch each other, so they are laid at the same time in
+    worker processes, each with the tiles already laid around it fixed.
+    Edges only join direct neighbours, so a worker only needs its block and
+    the ring of tiles around it. Fixing a whole ring of seams first fails
+    far too often, as layouts are correlated over long distances; a block
+    whose top and left borders leave it no layout is rare, and is laid
+    again in this process together with the tiles around it, widened by 1,
+    2, 4, ... tiles for up to retries attempts, instead of starting the
+    floor over. Showing that a block has no layout can take far longer than
+    laying a wider one, so every attempt gives up after BLOCK_STEPS_PER_TILE
+    search steps per cell. If the widest attempt fails too, every cell not
+    laid yet is laid in one search, and if even that gives up, the whole
+    floor is laid again with solve_coloring() and no step limit; a floor
+    that has a layout is therefore always laid.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        block_rows: Rows of tiles in each block
+        block_cols: Columns of tiles in each block
+        max_workers: Number of worker processes, defaults to the CPU count;
+            1 lays the blocks in this process
+        retries: Number of times a failed block is widened
+        method: 'forward_checking' or 'backtrack', the search of every
+            block (see resolve_region())
+    
+    Returns:
+        colormap if solution found, None otherwise
+    """
+    if method not in ('forward_checking', 'backtrack'):
+        raise ValueError("Unknown solver method: %r" % (method,))
+    tiles_list = canonical_catalogue(tiles_list)
+    colormap = [0] * (rows * cols)
+    row_bands = [(start, min(start + block_rows, rows)) for start in range(0, rows, block_rows)]
+    col_bands = [(start, min(start + block_cols, cols)) for start in range(0, cols, block_cols)]
+    waves = len(row_bands) + len(col_bands) - 1
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Laying", len(row_bands) * len(col_bands), "blocks in", waves, "waves")
+
+    executor = None
+    if max_workers != 1:
+        executor = ProcessPoolExecutor(max_workers, initializer=_init_block_worker,
+                                       initargs=(tiles_list, method, reporting.VERBOSITY, sys.stdout is sys.stderr))
+    try:
+        for wave in range(waves):
+            blocks = [(row_bands[i], col_bands[wave - i]) for i in range(len(row_bands))
+                      if 0 <= wave - i < len(col_bands)]
+            windows = [_window(colormap, rows, cols, row_range, col_range) for row_range, col_range in blocks]
+            if executor is None or len(windows) == 1:
+                results = [_solve_window(window, tiles_list, method) for window in windows]
+            else:
+                results = list(executor.map(_solve_block, windows))
+            failed = [block for block, window, region in zip(blocks, windows, results)
+                      if not _place(colormap, cols, window, region)]
+            for row_range, col_range in failed:
+                if reporting.VERBOSITY >= PROGRESS:
+                    print("No layout found for rows", row_range, "columns", col_range, "widening them")
+                if not _widen(colormap, rows, cols, row_range, col_range, tiles_list, method, retries):
+                    return _lay_rest(colormap, rows, cols, tiles_list, method)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return colormap
+
+
+def _widen(colormap, rows, cols, row_range, col_range, tiles_list, method, retries):
+    # Lay a failed block again with 1, 2, 4, ... tiles around it; False if every attempt fails
+    previous = None
+    for attempt in range(retries):
+        margin = 2 ** attempt
+        wider_rows = (max(row_range[0] - margin, 0), min(row_range[1] + margin, rows))
+        wider_cols = (max(col_range[0] - margin, 0), min(col_range[1] + margin, cols))
+        if (wider_rows, wider_cols) == previous:
+            break  # already the whole floor
+        previous = wider_rows, wider_cols
+        window = _window(colormap, rows, cols, wider_rows, wider_cols)
+        if _place(colormap, cols, window, _solve_window(window, tiles_list, method)):
+            return True
+    return False
+
+
+def _lay_rest(colormap, rows, cols, tiles_list, method):
+    # Last resort: the cells not laid yet in one search, then the whole floor without a step limit
+    edges_dict = generate_grid_edges(rows, cols)
+    cells = [cell for cell in range(rows * cols) if colormap[cell] == 0]
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Laying the", len(cells), "tiles left in one search")
+    solved = resolve_region(colormap, tiles_list, edges_dict, cells, method, _step_limit(len(cells)))
+    if solved is None:
+        if reporting.VERBOSITY >= PROGRESS:
+            print("Laying the whole floor again")
+        solved = solve_coloring(rows, cols, tiles_list, edges_dict, method)
+    return solved
+
+
+def _step_limit(num_cells):
+    # A should_stop callback that gives up after BLOCK_STEPS_PER_TILE steps per cell
+    checks = itertools.count(1)
+    return lambda: next(checks) * STOP_CHECK_INTERVAL > BLOCK_STEPS_PER_TILE * num_cells
+
+
+def _window(colormap, rows, cols, row_range, col_range):
+    # A rectangle and the ring of tiles around it, as a small floor of its own.
+    # generate_grid_edges() starts with a horizontal tile, so a window that
+    # would start on a vertical one starts one column (or row) earlier.
+    top = max(row_range[0] - 1, 0)
+    left = max(col_range[0] - 1, 0)
+    bottom = min(row_range[1] + 1, rows)
+    right = min(col_range[1] + 1, cols)
+    if (top + left) % 2:
+        if left > 0:
+            left -= 1
+        else:
+            top -= 1
+    window_cols = right - left
+    tiles = [colormap[row * cols + col] for row in range(top, bottom) for col in range(left, right)]
+    cells = rectangle_cells(window_cols, (row_range[0] - top, row_range[1] - top),
+                            (col_range[0] - left, col_range[1] - left))
+    return (top, left), (bottom - top, window_cols), tiles, cells
+
+
+def _solve_window(window, tiles_list, method):
+    # Tiles for the cells of a window, None if there are none or the step limit ran out
+    origin, dims, tiles, cells = window
+    edges_dict = _window_edges.get(dims)
+    if edges_dict is None:
+        edges_dict = _window_edges[dims] = generate_grid_edges(*dims)
+    solved = resolve_region(tiles, tiles_list, edges_dict, cells, method, _step_limit(len(cells)))
+    if solved is None:
+        return None
+    return [solved[cell] for cell in cells]
+
+
+def _place(colormap, cols, window, region):
+    # Copy the tiles solved for a window into colormap
+    if region is None:
+        return False
+    (top, left), (_, window_cols), _, cells = window
+    for cell, tile in zip(cells, region):
+        row, col = divmod(cell, window_cols)
+        colormap[(top + row) * cols + left + col] = tile
+    return True
+
+
+_window_edges = {}  # edges of the window shapes seen so far, per process
+
+
+def _init_block_worker(tiles_list, method, verbosity, to_stderr):
+    _init_output(verbosity, to_stderr)
+    _worker_state['tiles'] = tiles_list
+    _worker_state['method'] = method
+
+
+def _solve_block(window):
+    return _solve_window(window, _worker_state['tiles'], _worker_state['method'])
@@ -0,0 +1,110 @@
+"""
+Periodic layouts: a small patch that tiles a torus, stamped across any floor.
+
+The relations between neighbours only depend on the orientations of the
+two tiles, and with even periods the checkerboard of orientations repeats
+with the patch. A patch whose own borders fit each other (valid on a
+torus) therefore gives a valid layout of a floor of any size by copying
+it, without any search.
+"""
+import random
+
+from . import reporting
+from .grid import generate_torus_edges
+from .reporting import PROGRESS
+from .sat import solve_sat
+from .tiles import canonical_catalogue
+
+MAX_PERIOD = 8  # largest period tried in each direction
+
+_patch_cache = {}
+
+
+def torus_periods(max_period=MAX_PERIOD, min_period=2):
+    """
+    Even (period_rows, period_cols) pairs from min_period to max_period, smallest patches first.
+    """
+    periods = range(min_period + min_period % 2, max_period + 1, 2)
+    return sorted(((period_rows, period_cols) for period_rows in periods for period_cols in periods),
+                  key=lambda period: (period[0] * period[1], period))
+
+
+def find_periodic_patch(tiles_list, max_period=MAX_PERIOD, min_period=2, seed=None):
+    """
+    Find the smallest patch of tiles that is valid on a torus.
+    
+    Every pair of even periods up to max_period is tried in turn with
+    solve_sat(), which also shows quickly when a period has no patch.
+    Results, including the lack of a patch, are cached per catalogue for
+    the lifetime of the process.
+    
+    Args:
+        tiles_list: List of all possible tile configurations
+        max_period: Largest period tried in each direction
+        min_period: Smallest period tried in each direction; larger patches
+            make the repetition on a big floor less obvious
+        seed: None for the patch of the catalogue as given; any other value
+            shuffles the catalogue with it first, for a different patch
+    
+    Returns:
+        (period_rows, period_cols, patch) with patch the colormap of the
+        torus in row-major order, or None if no period up to max_period works
+    """
+    tiles_list = canonical_catalogue(tiles_list)
+    key = (tuple(tuple(tile) for tile in tiles_list), max_period, min_period, seed)
+    if key in _patch_cache:
+        return _patch_cache[key]
+    if seed is not None:
+        tiles_list = list(tiles_list)
+        random.Random(seed).shuffle(tiles_list)
+
+    found = None
+    for period_rows, period_cols in torus_periods(max_period, min_period):
+        patch = solve_sat(tiles_list, generate_torus_edges(period_rows, period_cols))
+        if patch is not None:
+            found = (period_rows, period_cols, patch)
+            break
+        if reporting.VERBOSITY >= PROGRESS:
+            print("No torus patch of", period_rows, "x", period_cols)
+    if found is not None and reporting.VERBOSITY >= PROGRESS:
+        print("Found a torus patch of", found[0], "x", found[1])
+    _patch_cache[key] = found
+    return found
+
+
+def clear_patch_cache():
+    """
+    Forget the patches found so far, e.g. to time finding them again.
+    """
+    _patch_cache.clear()
+
+
+def stamp_patch(patch, period_rows, period_cols, rows, cols, offset=(0, 0)):
+    """
+    Repeat a torus patch across a rows-by-cols floor.
+    
+    Args:
+        patch: Colormap of the torus, from find_periodic_patch()
+        period_rows: Rows of the patch
+        period_cols: Columns of the patch
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        offset: (row, col) of the patch that lands on vertex 0; their sum
+            must be even to keep the checkerboard
+    
+    Returns:
+        colormap of the floor; its entries are the patch's tile lists
+    """
+    row_offset, col_offset = offset
+    if (row_offset + col_offset) % 2:
+        raise ValueError("The offset %r would swap the horizontal and vertical tiles" % (offset,))
+    col_offset %= period_cols
+    repeats = -(-(cols + col_offset) // period_cols)
+    lines = []
+    for patch_row in range(period_rows):
+        line = patch[patch_row * period_cols:(patch_row + 1) * period_cols] * repeats
+        lines.append(line[col_offset:col_offset + cols])
+    colormap = []
+    for row in range(rows):
+        colormap.extend(lines[(row + row_offset) % period_rows])
+    return colormap
@@ -0,0 +1,161 @@
+"""
+Drawing colormaps.
+
+Maps are built directly as RGB pixel arrays with NumPy and written as PNG
+without any GUI. Matplotlib is only imported to show a map in a window,
+and NumPy only when a map is drawn.
+"""
+import os
+import struct
+import zlib
+
+from .validate import colormap_array
+
+COLORS = ["black", "green", "red", "blue", "grey", "beige"]
+# RGB values of COLORS, as matplotlib defines those names
+COLOR_RGB = [(0, 0, 0), (0, 128, 0), (255, 0, 0), (0, 0, 255), (128, 128, 128), (245, 245, 220)]
+# RGB value of cells without a tile (0 in the colormap), e.g. outside a floor plan
+EMPTY_RGB = (255, 255, 255)
+# Largest picture tile_map_image() builds, in pixels; building it takes about 12 bytes per pixel
+MAX_IMAGE_PIXELS = 1 << 26
+
+
+def tile_map_image(colormap, rows, cols, tile_pixels=40, row_range=None, col_range=None):
+    """
+    Build the picture of a colormap (or of a block of it) as an RGB array.
+    
+    Horizontal tiles show their bars top to bottom, vertical tiles left to
+    right, with tile 0 horizontal and the rest in a checkerboard, as in
+    generate_grid_edges(). Cells that hold 0 are drawn in EMPTY_RGB.
+    
+    Args:
+        colormap: Color assignments from solve_coloring()
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tile_pixels: Width and height of one tile in pixels, a multiple of 4
+        row_range: (start, stop) rows to draw, default all
+        col_range: (start, stop) columns to draw, default all
+    
+    Returns:
+        uint8 array of shape (tile rows * tile_pixels, tile cols * tile_pixels, 3)
+    
+    Raises:
+        ValueError: If the picture would have more than MAX_IMAGE_PIXELS
+            pixels; draw it in blocks or with fewer tile_pixels instead
+    """
+    import numpy as np
+
+    if tile_pixels % 4:
+        raise ValueError("tile_pixels must be a multiple of 4, got %r" % (tile_pixels,))
+    row_start, row_stop = row_range if row_range is not None else (0, rows)
+    col_start, col_stop = col_range if col_range is not None else (0, cols)
+    pixels = image_pixels(row_stop - row_start, col_stop - col_start, tile_pixels)
+    if pixels > MAX_IMAGE_PIXELS:
+        raise ValueError("A picture of %d x %d tiles at %d pixels per tile has %d pixels, more than %d; "
+                         "save it in blocks or with fewer tile_pixels"
+                         % (row_stop - row_start, col_stop - col_start, tile_pixels, pixels, MAX_IMAGE_PIXELS))
+
+    if isinstance(colormap, np.ndarray):
+        colormap = colormap.reshape(-1, 4)
+    bars = colormap_array(colormap).reshape(rows, cols, 4)
+    bars = bars[row_start:row_stop, col_start:col_stop]
+    block_rows, block_cols = bars.shape[:2]
+
+    # Which bar every pixel of a tile belongs to
+    bar_of_row = np.arange(tile_pixels) * 4 // tile_pixels
+    horizontal = np.broadcast_to(bar_of_row[:, None], (tile_pixels, tile_pixels))
+    vertical = horizontal.T
+    is_vertical = (np.add.outer(np.arange(row_start, row_stop), np.arange(col_start, col_stop)) % 2) == 1
+    bar_index = np.where(is_vertical[:, :, None, None], vertical, horizontal)
+
+    color_index = np.take_along_axis(bars, bar_index.reshape(block_rows, block_cols, -1), axis=2)
+    color_index = color_index.reshape(block_rows, block_cols, tile_pixels, tile_pixels)
+    color_index = color_index.transpose(0, 2, 1, 3).reshape(block_rows * tile_pixels, block_cols * tile_pixels)
+    palette = np.array(COLOR_RGB + [EMPTY_RGB], dtype=np.uint8)
+    return palette[color_index]  # -1, an empty cell, picks EMPTY_RGB
+
+
+def image_pixels(rows, cols, tile_pixels=40):
+    """
+    Number of pixels in the picture of rows x cols tiles.
+    """
+    return rows * cols * tile_pixels * tile_pixels
+
+
+def write_png(path, image):
+    """
+    Write an (height, width, 3) uint8 array as an 8-bit RGB PNG file.
+    """
+    height, width = image.shape[:2]
+    # Every scanline starts with filter type 0
+    raw = b''.join(b'\x00' + image[row].tobytes() for row in range(height))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def save_tile_map(colormap, rows, cols, path="tile_map.png", tile_pixels=40, block_tiles=None):
+    """
+    Save a colormap as PNG, optionally split into blocks for very large floors.
+    
+    Args:
+        colormap: Color assignments from solve_coloring()
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        path: PNG file to write; blocks go to <name>_r<i>_c<j>.png next to it
+        tile_pixels: Width and height of one tile in pixels, a multiple of 4;
+            4 gives one pixel per bar for a downsampled overview
+        block_tiles: (block rows, block cols) in tiles to write one file per
+            block, None for a single file
+    
+    Returns:
+        List of the paths written
+    """
+    if block_tiles is None:
+        write_png(path, tile_map_image(colormap, rows, cols, tile_pixels))
+        return [path]
+
+    block_rows, block_cols = block_tiles
+    stem, extension = os.path.splitext(path)
+    written = []
+    for i, row_start in enumerate(range(0, rows, block_rows)):
+        for j, col_start in enumerate(range(0, cols, block_cols)):
+            image = tile_map_image(colormap, rows, cols, tile_pixels,
+                                   (row_start, min(row_start + block_rows, rows)),
+                                   (col_start, min(col_start + block_cols, cols)))
+            block_path = "%s_r%d_c%d%s" % (stem, i, j, extension or '.png')
+            write_png(block_path, image)
+            written.append(block_path)
+    return written
+
+
+def draw_tile_map(colormap, rows, cols, path="tile_map.png", show=False, tile_pixels=40):
+    """
+    Save a colormap as PNG and optionally show it in a window.
+    
+    Args:
+        colormap: Color assignments from solve_coloring()
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        path: File to save the picture to, None to skip saving
+        show: Open a window with the picture; without it no GUI is used
+        tile_pixels: Width and height of one tile in pixels, a multiple of 4
+    """
+    if path is not None:
+        save_tile_map(colormap, rows, cols, path, tile_pixels)
+    if show:
+        import matplotlib.pyplot as plt
+        image = tile_map_image(colormap, rows, cols, tile_pixels)
+        scale = min(2.0, 20.0 / max(rows, cols))  # inches per tile, at most 20 inches across
+        fig, ax = plt.subplots(figsize=(cols * scale, rows * scale))
+        ax.imshow(image, interpolation='nearest')
+        ax.axis('off')
+        fig.tight_layout()
+        plt.show()
@@ -0,0 +1,164 @@
+"""
+Verbosity levels, search counters and sampled progress reports for the solvers.
+"""
+import csv
+import json
+import time
+
+# Verbosity levels for the solver output
+SILENT = 0    # no output from the solver
+PROGRESS = 1  # per-origin-tile messages and sampled progress reports
+TRACE = 2     # every candidate, placement and conflict (very slow on big floors)
+VERBOSITY = SILENT
+PROGRESS_INTERVAL = 5.0  # seconds between progress reports
+PROGRESS_SAMPLE = 1024   # placements between checks of the report clock
+
+
+def set_verbosity(level):
+    """
+    Set the solver verbosity to SILENT, PROGRESS or TRACE.
+    """
+    global VERBOSITY
+    VERBOSITY = level
+
+
+def new_progress(num_tiles, callback=None, interval=PROGRESS_INTERVAL):
+    """
+    Create the counters of a search.
+    
+    The searches fill them in whenever they are passed in, and keep no
+    counters at all otherwise. Progress reports are printed at PROGRESS
+    verbosity, and callback is called at the same moments.
+    
+    Counters besides 'placed' and 'backtracks':
+        'deepest': most tiles in a partial layout so far, the same measure
+            for every search, whether it fills vertices in order or not
+        'checks': candidate tiles tested against their placed neighbours
+            by the backtracking searches
+        'rejections': candidates turned down, per relation of the edge
+            that ruled them out; for backtrack_forward_checking() these
+            are the candidates pruned from the domains
+        'backtracks_at': per vertex, how often it ran out of candidates
+        'tile_placements': per tile (a tuple), how often it was placed
+        'first_solution': seconds from the start to the first complete
+            layout, None until there is one
+    
+    Args:
+        num_tiles: Number of vertices in the grid
+        callback: Optional callable taking the counters, for live progress
+        interval: Seconds between progress reports and callback calls
+    
+    Returns:
+        Dictionary of progress counters
+    """
+    now = time.time()
+    return {
+        'num_tiles': num_tiles,
+        'placed': 0,
+        'backtracks': 0,
+        'deepest': 0,
+        'checks': 0,
+        'rejections': {},
+        'backtracks_at': [0] * num_tiles,
+        'tile_placements': {},
+        'first_solution': None,
+        'start': now,
+        'last_report': now,
+        'callback': callback,
+        'interval': interval
+    }
+
+
+def record_placement(progress, depth, tile=None):
+    """
+    Count a placement and report progress if the report interval has passed.
+    
+    depth is the number of tiles in the partial layout once this one is
+    placed, fixed tiles included, whatever order the search fills it in.
+    The clock is only read every PROGRESS_SAMPLE placements.
+    """
+    progress['placed'] += 1
+    if depth > progress['deepest']:
+        progress['deepest'] = depth
+    if tile is not None:
+        placements = progress['tile_placements']
+        key = tuple(tile)
+        placements[key] = placements.get(key, 0) + 1
+    if progress['placed'] % PROGRESS_SAMPLE != 0:
+        return
+    callback = progress['callback']
+    if callback is None and VERBOSITY < PROGRESS:
+        return
+    now = time.time()
+    if now - progress['last_report'] < progress['interval']:
+        return
+    progress['last_report'] = now
+    if callback is not None:
+        callback(progress)
+    if VERBOSITY >= PROGRESS:
+        elapsed = now - progress['start']
+        print("Progress: placed", progress['placed'],
+              "backtracks", progress['backtracks'],
+              "(%.0f per second)" % (progress['backtracks'] / elapsed),
+              "deepest", progress['deepest'], "of", progress['num_tiles'], "tiles")
+
+
+def record_rejections(progress, relation, count=1):
+    """
+    Count candidates turned down because of an edge with this relation.
+    """
+    rejections = progress['rejections']
+    rejections[relation] = rejections.get(relation, 0) + count
+
+
+def record_solution(progress):
+    """
+    Note the time to the first complete layout.
+    """
+    if progress['first_solution'] is None:
+        progress['first_solution'] = time.time() - progress['start']
+
+
+def search_stats(progress):
+    """
+    The counters of a search as plain data, ready for JSON.
+    
+    Tiles are written as "c0,c1,c2,c3" and only vertices that ran out of
+    candidates appear in 'backtracks_at'.
+    """
+    return {
+        'num_tiles': progress['num_tiles'],
+        'placed': progress['placed'],
+        'backtracks': progress['backtracks'],
+        'deepest': progress['deepest'],
+        'checks': progress['checks'],
+        'rejections': dict(sorted(progress['rejections'].items())),
+        'backtracks_at': {str(vertex): count for vertex, count in enumerate(progress['backtracks_at']) if count},
+        'tile_placements': {",".join(map(str, tile)): count
+                            for tile, count in sorted(progress['tile_placements'].items())},
+        'first_solution': progress['first_solution'],
+        'elapsed': time.time() - progress['start'],
+    }
+
+
+def write_search_stats(progress, path):
+    """
+    Write the counters of a search to path, as CSV if it ends in .csv and JSON otherwise.
+    
+    The CSV has one (section, key, value) row per counter, per relation,
+    per vertex and per tile.
+    """
+    stats = search_stats(progress)
+    with open(path, 'w', newline='') as f:
+        if not path.endswith('.csv'):
+            json.dump(stats, f, indent=1)
+            f.write("\n")
+            return
+        writer = csv.writer(f)
+        writer.writerow(['section', 'key', 'value'])
+        for name, value in stats.items():
+            if isinstance(value, dict):
+                for key, count in value.items():
+                    writer.writerow([name, key, count])
+            else:
+                writer.writerow(['counter', name, value])
@@ -0,0 +1,429 @@
+"""
+Solving through a SAT encoding, which proves quickly that a floor has no layout.
+
+Variable v * K + i + 1 says that vertex v holds tile i of the (duplicate
+free) catalogue of K tiles. Every vertex holds at least one tile, and for
+every edge each pair of tiles that share a color where they touch is
+forbidden. The clauses are written as DIMACS CNF for any SAT solver;
+solve_sat() runs an installed one, or a small CDCL solver in pure Python.
+"""
+import heapq
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from . import reporting
+from .reporting import PROGRESS
+from .tiles import build_compatibility_tables, canonical_catalogue
+
+# Solvers looked for on the PATH, in order of preference
+SAT_SOLVERS = ('kissat', 'cadical', 'cryptominisat5', 'glucose', 'minisat', 'picosat')
+AT_MOST_ONE = (None, 'pairwise', 'sequential')
+RESTART_BASE = 100  # conflicts per unit of the Luby restart sequence
+TIME_CHECK_INTERVAL = 256  # conflicts between checks of the clock
+
+
+def encode_cnf(tiles_list, edges_dict, at_most_one=None):
+    """
+    Encode a floor as CNF clauses.
+    
+    The at-least-one clauses and the forbidden pairs are enough for every
+    model to hold a layout: if a vertex holds several tiles, each of them
+    fits all its neighbours. at_most_one adds the clauses that make the
+    tile of every vertex unique, which is needed to count layouts and
+    often helps propagation: 'pairwise' forbids every pair of tiles,
+    'sequential' uses the sequential counter with K - 1 extra variables
+    per vertex and about 3K clauses instead of K(K-1)/2.
+    
+    Args:
+        tiles_list: List of tile configurations, without duplicates
+        edges_dict: Edge dictionary from generate_grid_edges() or floor_plan_edges()
+        at_most_one: None, 'pairwise' or 'sequential'
+    
+    Returns:
+        (num_vars, clauses): the number of variables and a list of clauses,
+        each a list of non-zero literals as in DIMACS
+    """
+    if at_most_one not in AT_MOST_ONE:
+        raise ValueError("Unknown at-most-one encoding: %r" % (at_most_one,))
+    neighbors = edges_dict['neighbors']
+    num_tiles = len(neighbors)
+    num_candidates = len(tiles_list)
+    tables = build_compatibility_tables(tiles_list)
+    clauses = []
+    num_vars = num_tiles * num_candidates
+
+    for vertex in range(num_tiles):
+        base = vertex * num_candidates + 1
+        choices = list(range(base, base + num_candidates))
+        clauses.append(choices)
+        if at_most_one == 'pairwise':
+            for index, first in enumerate(choices):
+                for second in choices[index + 1:]:
+                    clauses.append([-first, -second])
+        elif at_most_one == 'sequential' and num_candidates > 1:
+            # counter[k] is true once one of choices[0..k] is true
+            counter = list(range(num_vars + 1, num_vars + num_candidates))
+            num_vars += num_candidates - 1
+            clauses.append([-choices[0], counter[0]])
+            for k in range(1, num_candidates - 1):
+                clauses.append([-choices[k], counter[k]])
+                clauses.append([-counter[k - 1], counter[k]])
+                clauses.append([-choices[k], -counter[k - 1]])
+            clauses.append([-choices[-1], -counter[-1]])
+
+        # Each contact once, from its lower-numbered vertex
+        for neighbor, relation in neighbors[vertex]:
+            if neighbor < vertex:
+                continue
+            neighbor_base = neighbor * num_candidates + 1
+            every_candidate = (1 << num_candidates) - 1
+            for neighbor_index, allowed in enumerate(tables[relation]):
+                forbidden = every_candidate & ~allowed
+                while forbidden:
+                    low = forbidden & -forbidden
+                    clauses.append([-(base + low.bit_length() - 1), -(neighbor_base + neighbor_index)])
+                    forbidden ^= low
+    return num_vars, clauses
+
+
+def write_dimacs(path, num_vars, clauses, comments=()):
+    """
+    Write clauses as a DIMACS CNF file, with optional comment lines first.
+    """
+    with open(path, 'w') as f:
+        for comment in comments:
+            f.write("c %s\n" % (comment,))
+        f.write("p cnf %d %d\n" % (num_vars, len(clauses)))
+        for clause in clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def decode_model(model, num_tiles, tiles_list):
+    """
+    Read the layout out of a model.
+    
+    Args:
+        model: The true literals (or all literals) of a model
+        num_tiles: Number of vertices in the grid
+        tiles_list: The catalogue the clauses were encoded with
+    
+    Returns:
+        colormap; a vertex holding several tiles gets the first of them
+    """
+    num_candidates = len(tiles_list)
+    colormap = [0] * num_tiles
+    for literal in model:
+        if 0 < literal <= num_tiles * num_candidates:
+            vertex, index = divmod(literal - 1, num_candidates)
+            if colormap[vertex] == 0:
+                colormap[vertex] = tiles_list[index]
+    return colormap
+
+
+def find_sat_solver():
+    """
+    Path of the first solver of SAT_SOLVERS on the PATH, None if there is none.
+    """
+    for name in SAT_SOLVERS:
+        path = shutil.which(name)
+        if path is not None:
+            return path
+    return None
+
+
+def run_sat_solver(solver, num_vars, clauses, time_budget=None):
+    """
+    Run an external SAT solver on the clauses.
+    
+    The solver reads a DIMACS file and reports as in the SAT competition
+    ("s SATISFIABLE" and "v" lines, or exit codes 10 and 20); MiniSat and
+    Glucose, which write the model to a second file, are recognised by name.
+    
+    Args:
+        solver: Name or path of the solver executable
+        num_vars: Number of variables
+        clauses: Clauses from encode_cnf()
+        time_budget: Seconds before giving up, None to wait
+    
+    Returns:
+        (satisfiable, model): satisfiable is True, False or None when the
+        solver gave no answer in time; model is the list of literals
+    """
+    name = os.path.basename(solver)
+    writes_result_file = name.startswith(('minisat', 'glucose'))
+    with tempfile.TemporaryDirectory() as directory:
+        cnf_path = os.path.join(directory, "floor.cnf")
+        result_path = os.path.join(directory, "result.txt")
+        write_dimacs(cnf_path, num_vars, clauses)
+        command = [solver, cnf_path, result_path] if writes_result_file else [solver, cnf_path]
+        try:
+            finished = subprocess.run(command, capture_output=True, text=True, timeout=time_budget)
+        except subprocess.TimeoutExpired:
+            return None, []
+        if writes_result_file:
+            if not os.path.exists(result_path):
+                return None, []
+            with open(result_path) as f:
+                lines = f.read().split()
+            if not lines or lines[0] not in ('SAT', 'UNSAT'):
+                return None, []
+            return lines[0] == 'SAT', [int(literal) for literal in lines[1:] if literal != '0']
+
+    satisfiable = {10: True, 20: False}.get(finished.returncode)
+    model = []
+    for line in finished.stdout.splitlines():
+        if line.startswith('s '):
+            satisfiable = {'SATISFIABLE': True, 'UNSATISFIABLE': False}.get(line[2:].strip(), satisfiable)
+        elif line.startswith('v '):
+            model.extend(int(literal) for literal in line[2:].split() if literal != '0')
+    return satisfiable, model
+
+
+def cdcl(num_vars, clauses, time_budget=None):
+    """
+    A small conflict-driven clause learning SAT solver in pure Python.
+    
+    Two watched literals per clause, first-UIP learning, activity-based
+    branching with saved phases, and Luby restarts. Far slower than a real
+    SAT solver, but learning lets it prove small floors unsatisfiable
+    without walking the whole search tree.
+    
+    Args:
+        num_vars: Number of variables
+        clauses: Lists of non-zero literals
+        time_budget: Seconds before giving up, None to search until done
+    
+    Returns:
+        (satisfiable, model): satisfiable is True, False or None when time
+        ran out; model lists a literal for every variable when satisfiable
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    value = [0] * (num_vars + 1)  # 1 true, -1 false, 0 unassigned
+    level = [0] * (num_vars + 1)
+    reason = [None] * (num_vars + 1)
+    activity = [0.0] * (num_vars + 1)
+    phase = [-1] * (num_vars + 1)  # tiles are mostly absent, so try false first
+    watches = [[] for _ in range(2 * num_vars + 2)]  # literal l at l if l > 0 else num_vars - l
+    trail = []
+    trail_limits = []  # trail position where each decision level starts
+    heap = [(0.0, var) for var in range(1, num_vars + 1)]
+    increment = 1.0
+
+    def slot(literal):
+        return literal if literal > 0 else num_vars - literal
+
+    def literal_value(literal):
+        return value[literal] if literal > 0 else -value[-literal]
+
+    def assign(literal, clause):
+        var = abs(literal)
+        value[var] = 1 if literal > 0 else -1
+        level[var] = len(trail_limits)
+        reason[var] = clause
+        trail.append(literal)
+
+    units = []
+    for clause in clauses:
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            continue  # always true
+        if not clause:
+            return False, []
+        if len(clause) == 1:
+            units.append(clause[0])
+            continue
+        watches[slot(clause[0])].append(clause)
+        watches[slot(clause[1])].append(clause)
+    for literal in units:
+        current = literal_value(literal)
+        if current < 0:
+            return False, []
+        if current == 0:
+            assign(literal, None)
+
+    head = 0
+
+    def propagate():
+        # Returns a conflicting clause, or None once all implications are made
+        nonlocal head
+        while head < len(trail):
+            false_literal = -trail[head]
+            head += 1
+            watching = watches[slot(false_literal)]
+            kept = []
+            for position, clause in enumerate(watching):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if literal_value(first) > 0:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if literal_value(clause[k]) >= 0:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches[slot(clause[1])].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if literal_value(first) < 0:
+                        kept.extend(watching[position + 1:])
+                        watches[slot(false_literal)] = kept
+                        return clause
+                    assign(first, clause)
+            watches[slot(false_literal)] = kept
+        return None
+
+    def analyze(conflict):
+        # First-UIP learnt clause, with the asserting literal first
+        nonlocal increment
+        current_level = len(trail_limits)
+        seen = set()
+        learnt = [0]
+        pending = 0
+        position = len(trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for other in clause if literal is None else clause[1:]:
+                var = abs(other)
+                if var in seen or level[var] == 0:
+                    continue
+                seen.add(var)
+                activity[var] += increment
+                heapq.heappush(heap, (-activity[var], var))
+                if level[var] == current_level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            while abs(trail[position]) not in seen:
+                position -= 1
+            literal = trail[position]
+            position -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = reason[abs(literal)]
+        learnt[0] = -literal
+        increment *= 1.05
+        if increment > 1e100:
+            for var in range(1, num_vars + 1):
+                activity[var] *= 1e-100
+            increment *= 1e-100
+            heap[:] = [(-activity[var], var) for var in range(1, num_vars + 1) if not value[var]]
+            heapq.heapify(heap)
+        # Watch the literal of the highest level after the asserting one
+        back_level = 0
+        if len(learnt) > 1:
+            highest = max(range(1, len(learnt)), key=lambda index: level[abs(learnt[index])])
+            learnt[1], learnt[highest] = learnt[highest], learnt[1]
+            back_level = level[abs(learnt[1])]
+        return learnt, back_level
+
+    def backjump(target_level):
+        nonlocal head
+        if len(trail_limits) <= target_level:
+            return
+        start = trail_limits[target_level]
+        for literal in trail[start:]:
+            var = abs(literal)
+            phase[var] = value[var]
+            value[var] = 0
+            reason[var] = None
+            heapq.heappush(heap, (-activity[var], var))
+        del trail[start:]
+        del trail_limits[target_level:]
+        head = len(trail)
+
+    def luby(index):
+        # The index-th term (from 0) of 1, 1, 2, 1, 1, 2, 4, ...
+        size, power = 1, 0
+        while size < index + 1:
+            power += 1
+            size = 2 * size + 1
+        while size - 1 != index:
+            size = (size - 1) // 2
+            power -= 1
+            index %= size
+        return 1 << power
+
+    conflicts = 0
+    restarts = 0
+    restart_at = RESTART_BASE * luby(0)
+    while True:
+        conflict = propagate()
+        if conflict is not None:
+            if not trail_limits:
+                return False, []
+            conflicts += 1
+            learnt, back_level = analyze(conflict)
+            backjump(back_level)
+            if len(learnt) == 1:
+                assign(learnt[0], None)
+            else:
+                watches[slot(learnt[0])].append(learnt)
+                watches[slot(learnt[1])].append(learnt)
+                assign(learnt[0], learnt)
+            if deadline is not None and not conflicts % TIME_CHECK_INTERVAL and time.perf_counter() >= deadline:
+                return None, []
+            continue
+
+        if conflicts >= restart_at:
+            restarts += 1
+            restart_at = conflicts + RESTART_BASE * luby(restarts)
+            backjump(0)
+        if len(heap) > 4 * num_vars + 1000:  # drop the stale entries
+            heap[:] = [(-activity[var], var) for var in range(1, num_vars + 1) if not value[var]]
+            heapq.heapify(heap)
+        while heap and value[heap[0][1]]:
+            heapq.heappop(heap)
+        if not heap:
+            return True, [var if value[var] > 0 else -var for var in range(1, num_vars + 1)]
+        var = heapq.heappop(heap)[1]
+        trail_limits.append(len(trail))
+        assign(var if phase[var] > 0 else -var, None)
+
+
+def solve_sat(tiles_list, edges_dict, solver=None, at_most_one=None, time_budget=None, cnf_path=None):
+    """
+    Solve the tile coloring problem with a SAT solver.
+    
+    Args:
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges() or floor_plan_edges()
+        solver: Name or path of a SAT solver; None takes the first of
+            SAT_SOLVERS on the PATH, and 'python' (or none installed) cdcl()
+        at_most_one: At-most-one encoding for encode_cnf()
+        time_budget: Seconds before giving up, None to search until done
+        cnf_path: Optional file to also write the DIMACS CNF to
+    
+    Returns:
+        colormap if solution found, None if there is none
+    
+    Raises:
+        TimeoutError: When the solver gave no answer within time_budget
+    """
+    tiles_list = canonical_catalogue(tiles_list)
+    num_tiles = len(edges_dict['neighbors'])
+    num_vars, clauses = encode_cnf(tiles_list, edges_dict, at_most_one)
+    if cnf_path is not None:
+        write_dimacs(cnf_path, num_vars, clauses, ["floortiler: %d tiles, catalogue of %d" % (
+            num_tiles, len(tiles_list))])
+    if solver is None:
+        solver = find_sat_solver() or 'python'
+    if reporting.VERBOSITY >= PROGRESS:
+        print("SAT encoding with", num_vars, "variables and", len(clauses), "clauses, solving with", solver)
+
+    if solver == 'python':
+        satisfiable, model = cdcl(num_vars, clauses, time_budget)
+    else:
+        satisfiable, model = run_sat_solver(solver, num_vars, clauses, time_budget)
+    if satisfiable is None:
+        raise TimeoutError("No answer from %s within %s seconds" % (solver, time_budget))
+    if not satisfiable:
+        if reporting.VERBOSITY >= PROGRESS:
+            print("No layout exists: the CNF is unsatisfiable")
+        return None
+    return decode_model(model, num_tiles, tiles_list)
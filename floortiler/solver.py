@@ -0,0 +1,915 @@
+"""
+Solvers for the tile coloring problem.
+
+A colormap is a list with one tile per grid vertex in row-major order,
+0 where nothing is placed yet.
+"""
+import heapq
+import random
+
+from . import reporting
+from .grid import RELATIONS, build_neighbor_index, generate_grid_edges, grid_reflections, grid_row_relations
+from .local_search import min_conflicts
+from .periodic import MAX_PERIOD, find_periodic_patch, stamp_patch
+from .reporting import PROGRESS, TRACE, new_progress, record_placement, record_rejections, record_solution
+from .sat import solve_sat
+from .tiles import (build_compatibility_tables, build_tile_masks, canonical_catalogue, compatible_tiles,
+                    placed_compatibility_rows, reversal_index)
+
+STOP_CHECK_INTERVAL = 256  # search steps between checks of a stop callback
+MAX_PROFILE_STATES = 200000  # profiles count_colorings() keeps before it needs a limit
+MAX_ROW_STATES = 5000  # row states per parity before the transfer matrix gives up
+
+
+def issafe(vertex, tile, edges_dict, colormap, progress=None):
+    """
+    Check if a tile assignment is valid given the adjacency constraints.
+    
+    Args:
+        vertex: The tile position to check
+        tile: List of 4 colors [c0, c1, c2, c3] to assign
+        edges_dict: Edge dictionary from generate_grid_edges(), uses its 'neighbors' index
+        colormap: Current color assignments (0 means unassigned)
+        progress: Optional counters from new_progress(), for the checks and rejections
+    
+    Returns:
+        True if tile can be safely assigned, False otherwise
+    """
+    if progress is not None:
+        progress['checks'] += 1
+
+    # Only look at the (at most 4) real neighbours of this vertex
+    for neighbor, relation in edges_dict['neighbors'][vertex]:
+        if colormap[neighbor] == 0:  # Neighbor is unassigned
+            continue
+
+        if relation == 'all_to_first':
+            # All 4 bars of current tile touch first bar of neighbor
+            neighbor_first_bar = colormap[neighbor][0]
+            if neighbor_first_bar in tile:
+                if reporting.VERBOSITY >= TRACE:
+                    print("tile", tile, "bars conflict with neighbor", neighbor, "first bar", colormap[neighbor])
+                if progress is not None:
+                    record_rejections(progress, relation)
+                return False
+
+        elif relation == 'first_to_all':
+            # First bar of current tile touches all 4 bars of neighbor
+            our_first_bar = tile[0]
+            if our_first_bar in colormap[neighbor]:
+                if reporting.VERBOSITY >= TRACE:
+                    print("tile", tile, "first bar conflicts with neighbor", neighbor, "bars", colormap[neighbor])
+                if progress is not None:
+                    record_rejections(progress, relation)
+                return False
+
+        elif relation == 'all_to_last':
+            # All 4 bars of current tile touch last bar of neighbor
+            neighbor_last_bar = colormap[neighbor][3]
+            if neighbor_last_bar in tile:
+                if reporting.VERBOSITY >= TRACE:
+                    print("tile", tile, "conflicts with neighbor", neighbor, "last bar", colormap[neighbor])
+                if progress is not None:
+                    record_rejections(progress, relation)
+                return False
+
+        elif relation == 'last_to_all':
+            # Last bar of current tile touches all 4 bars of neighbor
+            our_last_bar = tile[3]
+            if our_last_bar in colormap[neighbor]:
+                if reporting.VERBOSITY >= TRACE:
+                    print("tile", tile, "last bar conflicts with neighbor", neighbor, "bars", colormap[neighbor])
+                if progress is not None:
+                    record_rejections(progress, relation)
+                return False
+    
+    return True
+
+
+def symmetry_breaking_masks(rows, cols, tiles_list, root_index):
+    """
+    Tiles allowed per vertex once symmetric layouts are left out.
+    
+    When the catalogue holds every tile's reversal, each reflection from
+    grid_reflections() maps layouts to layouts. Of a layout and its
+    reflection only the ones whose tile at vertex 0 comes no later in
+    tiles_list than the tile the reflection brings to vertex 0 are kept,
+    which always keeps at least one layout of the pair. With
+    tiles_list[root_index] at vertex 0 this narrows the vertices that
+    reflections map vertex 0 to.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations, without duplicates
+        root_index: Index in tiles_list of the tile at vertex 0
+    
+    Returns:
+        List with a bitset of the allowed tiles_list entries per vertex (all
+        of them if the catalogue lacks reversals), or None if the tile at
+        vertex 0 is itself left out
+    """
+    num_candidates = len(tiles_list)
+    masks = [(1 << num_candidates) - 1] * (rows * cols)
+    reversal = reversal_index(tiles_list)
+    if None in reversal:
+        return masks
+    for vertex, turned in grid_reflections(rows, cols):
+        allowed = 0
+        for index in range(num_candidates):
+            if (reversal[index] if turned else index) >= root_index:
+                allowed |= 1 << index
+        if vertex == 0 and not allowed >> root_index & 1:
+            return None
+        masks[vertex] &= allowed
+    return masks
+
+
+def solve_coloring(rows, cols, tiles_list, edges_dict, method='backtrack', progress=None):
+    """
+    Solve the tile coloring problem using backtracking.
+    
+    The default method 'backtrack' uses backtrack_iterative(), so floors are
+    not limited by the recursion limit. 'forward_checking' uses
+    backtrack_forward_checking(), which finishes much larger floors.
+    'transfer_matrix' uses solve_transfer_matrix() for long, narrow floors.
+    'min_conflicts' runs min_conflicts() with its default time budget, for
+    floors too big for complete search; it may miss a layout that exists.
+    'sat' uses solve_sat(), which also shows quickly that there is none.
+    'periodic' uses solve_periodic(), which lays floors of any size by
+    repeating a small patch.
+    
+    Duplicate tiles are dropped from the catalogue first, and with both
+    search methods layouts that are reflections of others are skipped (see
+    symmetry_breaking_masks()). The colormap holds entries of tiles_list;
+    catalogue_entries() gives their indices. For a floor plan from
+    floor_plan_edges() it holds one tile per tiled cell, and reflections
+    are not skipped.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges() or floor_plan_edges()
+        method: 'backtrack', 'forward_checking', 'transfer_matrix', 'min_conflicts', 'sat' or 'periodic'
+        progress: Optional counters from new_progress(), filled in by the
+            'backtrack' and 'forward_checking' searches; created when the
+            verbosity is PROGRESS or more
+    
+    Returns:
+        colormap if solution found, None otherwise
+    """
+    num_tiles = len(edges_dict['neighbors'])
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Number of tiles is ", num_tiles)
+    colormap = [0] * num_tiles
+    if not num_tiles:
+        return colormap  # a floor plan without tiled cells
+    if progress is None and reporting.VERBOSITY >= PROGRESS:
+        progress = new_progress(num_tiles)
+    tiles_list = canonical_catalogue(tiles_list)
+    floor_plan = 'cells' in edges_dict  # the reflections of the rectangle do not apply
+
+    if method == 'forward_checking':
+        if floor_plan or None in reversal_index(tiles_list) or not grid_reflections(rows, cols):
+            if backtrack_forward_checking(num_tiles, tiles_list, edges_dict, colormap, True, progress):
+                return colormap
+        else:
+            # Split on the tile at vertex 0 to apply the symmetry breaking
+            for index, tile in enumerate(tiles_list):
+                masks = symmetry_breaking_masks(rows, cols, tiles_list, index)
+                if masks is None:
+                    continue
+                colormap[0] = tile
+                if backtrack_forward_checking(num_tiles, tiles_list, edges_dict, colormap, True, progress,
+                                              None, masks):
+                    return colormap
+                colormap = [0] * num_tiles
+        if reporting.VERBOSITY >= PROGRESS:
+            print("Could not solve colormap")
+        return None
+    elif method == 'transfer_matrix':
+        colormap = solve_transfer_matrix(rows, cols, tiles_list, edges_dict)
+        if colormap is None and reporting.VERBOSITY >= PROGRESS:
+            print("Could not solve colormap")
+        return colormap
+    elif method == 'min_conflicts':
+        colormap, conflicts = min_conflicts(rows, cols, tiles_list, edges_dict)
+        if conflicts:
+            if reporting.VERBOSITY >= PROGRESS:
+                print("Could not solve colormap, best layout has", conflicts, "conflicts")
+            return None
+        return colormap
+    elif method == 'sat':
+        return solve_sat(tiles_list, edges_dict)
+    elif method == 'periodic':
+        return solve_periodic(rows, cols, tiles_list, edges_dict)
+    elif method != 'backtrack':
+        raise ValueError("Unknown solver method: %r" % (method,))
+
+    counter = 0  # Counter for tiles tried at vertex 0
+    
+    for index, tile in enumerate(tiles_list):
+        counter = counter + 1
+        masks = None if floor_plan else symmetry_breaking_masks(rows, cols, tiles_list, index)
+        if masks is None and not floor_plan:
+            if reporting.VERBOSITY >= PROGRESS:
+                print("Skipping origin tile", tile, "at vertex 0, its layouts are reflections of earlier ones")
+            continue
+        if reporting.VERBOSITY >= PROGRESS:
+            print("Trying origin tile", tile, "at vertex 0", counter, "of", len(tiles_list))
+        colormap[0] = tile
+        if backtrack_iterative(num_tiles, tiles_list, edges_dict, colormap, 1, progress, None, masks):
+            return colormap
+        else:
+            if reporting.VERBOSITY >= PROGRESS:
+                print("Tile", tile, "does not work at vertex 0, trying next tile")
+            colormap[0] = 0  # Backtrack
+
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Could not solve colormap")
+    return None
+
+
+def resolve_region(colormap, tiles_list, edges_dict, cells, method='forward_checking', should_stop=None):
+    """
+    Lay new tiles on some cells of a floor, keeping every other tile as it is.
+    
+    Only the region is searched: its cells are numbered 0 to len(cells) - 1
+    in a small floor of their own, and the fixed tiles around it become the
+    starting candidates of the cells they touch. The work depends on the
+    size of the region, not of the floor. Cells outside the region that
+    hold 0 do not constrain it.
+    
+    Args:
+        colormap: Existing color assignments
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges()
+        cells: Vertices to lay again, e.g. from rectangle_cells()
+        method: 'forward_checking' or 'backtrack'
+        should_stop: Optional callable, checked every STOP_CHECK_INTERVAL steps;
+            the search gives up and returns None once it returns True
+    
+    Returns:
+        New colormap with the region laid again, None if no tiles fit it;
+        colormap itself is not changed
+    """
+    if method not in ('forward_checking', 'backtrack'):
+        raise ValueError("Unknown solver method: %r" % (method,))
+    tiles_list = canonical_catalogue(tiles_list)
+    tables = build_compatibility_tables(tiles_list)
+    index_of = {}
+    for index, tile in enumerate(tiles_list):
+        index_of.setdefault(tuple(tile), index)
+    masks = None
+
+    cells = sorted(set(cells))
+    local = {vertex: index for index, vertex in enumerate(cells)}
+    neighbors = edges_dict['neighbors']
+    allowed_tiles = [(1 << len(tiles_list)) - 1] * len(cells)
+    region_edges = {relation: [] for relation in RELATIONS}
+    for index, vertex in enumerate(cells):
+        for neighbor, relation in neighbors[vertex]:
+            if neighbor in local:
+                region_edges[relation].append([index, local[neighbor]])
+                continue
+            tile = colormap[neighbor]
+            if tile == 0:
+                continue
+            neighbor_index = index_of.get(tuple(tile))
+            if neighbor_index is not None:
+                allowed_tiles[index] &= tables[relation][neighbor_index]
+            else:
+                # A fixed tile that is not in the catalogue
+                if masks is None:
+                    masks = build_tile_masks(tiles_list)
+                allowed_tiles[index] &= compatible_tiles(tile, relation, masks)
+    region_edges['neighbors'] = build_neighbor_index(region_edges, len(cells))
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Laying", len(cells), "tiles again")
+
+    region = [0] * len(cells)
+    if method == 'forward_checking':
+        solved = backtrack_forward_checking(len(cells), tiles_list, region_edges, region, True, None, should_stop,
+                                            allowed_tiles)
+    else:
+        solved = backtrack_iterative(len(cells), tiles_list, region_edges, region, 0, None, should_stop,
+                                     allowed_tiles)
+    if not solved:
+        if reporting.VERBOSITY >= PROGRESS:
+            print("No tiles fit the region")
+        return None
+    colormap = list(colormap)
+    for index, vertex in enumerate(cells):
+        colormap[vertex] = region[index]
+    return colormap
+
+
+def backtrack(vertex, num_tiles, tiles_list, edges_dict, colormap, progress=None):
+    if vertex == num_tiles:
+        if reporting.VERBOSITY >= TRACE:
+            print("All tiles assigned successfully")
+        if progress is not None:
+            record_solution(progress)
+        return True  # All tiles assigned successfully
+    counter = 0
+    for tile in tiles_list:
+        counter = counter + 1
+        if reporting.VERBOSITY >= TRACE:
+            print("Trying tile", tile, "at vertex", vertex, "with colormap", colormap, "tile number", counter, "of", len(tiles_list))
+        if issafe(vertex, tile, edges_dict, colormap, progress):
+            colormap[vertex] = tile
+            if reporting.VERBOSITY >= TRACE:
+                print("Placing tile", tile,  "at vertex", vertex)
+            if progress is not None:
+                record_placement(progress, vertex + 1, tile)
+            if backtrack(vertex + 1, num_tiles, tiles_list, edges_dict, colormap, progress):
+                if reporting.VERBOSITY >= TRACE:
+                    print("Tile", tile, "works at vertex", vertex)
+                return True
+            if progress is not None:
+                progress['backtracks'] += 1
+                progress['backtracks_at'][vertex + 1] += 1
+        else:
+            if reporting.VERBOSITY >= TRACE:
+                print("Tile", tile, "does not work at vertex", vertex)
+            colormap[vertex] = 0
+
+    colormap[vertex] = 0  # Leave no stale tile behind for earlier vertices
+    return False
+
+
+def backtrack_iterative(num_tiles, tiles_list, edges_dict, colormap, start_vertex=1, progress=None, should_stop=None,
+                        allowed_tiles=None):
+    """
+    Non-recursive version of backtrack() using an explicit stack.
+    
+    Tiles are tried in the same order as backtrack(), so both return the
+    same colormap. This is the first result of search_iterative().
+    
+    Args:
+        num_tiles: Number of vertices in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges()
+        colormap: Current color assignments, vertices before start_vertex are fixed
+        start_vertex: First vertex to assign
+        progress: Optional counters from new_progress()
+        should_stop: Optional callable, checked every STOP_CHECK_INTERVAL steps;
+            the search gives up and returns False once it returns True
+        allowed_tiles: Optional list with a bitset per vertex of the tiles_list
+            entries allowed there, e.g. from symmetry_breaking_masks()
+    
+    Returns:
+        True if all tiles were assigned (colormap is filled in), False otherwise
+    """
+    for _ in search_iterative(num_tiles, tiles_list, edges_dict, colormap, start_vertex, progress, should_stop,
+                              allowed_tiles):
+        return True
+    return False
+
+
+def search_iterative(num_tiles, tiles_list, edges_dict, colormap, start_vertex=1, progress=None, should_stop=None,
+                     allowed_tiles=None):
+    """
+    Depth-first search with an explicit stack, yielding every complete colormap.
+    
+    The stack holds, for every vertex from start_vertex up to the current one,
+    the index in tiles_list of the next candidate to try there. Constraint
+    checks are lookups in the tables from build_compatibility_tables()
+    instead of issafe()'s list scans. After a solution is yielded the search
+    carries on from where it stopped.
+    
+    Args:
+        Same as backtrack_iterative()
+    
+    Yields:
+        colormap, filled in; it is changed in place when the search resumes,
+        so copy it to keep it
+    """
+    num_candidates = len(tiles_list)
+    tables = build_compatibility_tables(tiles_list)
+    neighbors = edges_dict['neighbors']
+
+    rows_by_index, placed_rows = placed_compatibility_rows(colormap, tiles_list, tables)
+
+    if allowed_tiles is None:
+        allowed_tiles = [(1 << num_candidates) - 1] * num_tiles
+    next_candidate = [0] * num_tiles
+    trace = reporting.VERBOSITY >= TRACE
+    report = progress is not None
+    countdown = STOP_CHECK_INTERVAL
+    vertex = start_vertex
+
+    def count_checks(vertex, first, stop):
+        # Candidates first to stop - 1 were tested at vertex; blame each one
+        # turned down on the first edge that rules it out, as issafe() does
+        tested = allowed_tiles[vertex] & ((1 << stop) - (1 << first))
+        progress['checks'] += tested.bit_count()
+        for neighbor, relation in neighbors[vertex]:
+            rows = placed_rows[neighbor]
+            if rows is not None:
+                turned_down = tested & ~rows[relation]
+                if turned_down:
+                    record_rejections(progress, relation, turned_down.bit_count())
+                    tested ^= turned_down
+
+    while True:
+        while start_vertex <= vertex < num_tiles:
+            if should_stop is not None:
+                countdown -= 1
+                if not countdown:
+                    countdown = STOP_CHECK_INTERVAL
+                    if should_stop():
+                        return
+            allowed = allowed_tiles[vertex]
+            for neighbor, relation in neighbors[vertex]:
+                rows = placed_rows[neighbor]
+                if rows is not None:
+                    allowed &= rows[relation]
+            index = next_candidate[vertex]
+            remaining = allowed >> index
+            if not remaining:
+                # No candidate left here: clear this vertex and go back one
+                if report:
+                    count_checks(vertex, index, num_candidates)
+                next_candidate[vertex] = 0
+                colormap[vertex] = 0
+                placed_rows[vertex] = None
+                if trace:
+                    print("No tile works at vertex", vertex)
+                vertex -= 1
+                if report and vertex >= start_vertex:
+                    progress['backtracks'] += 1
+                    progress['backtracks_at'][vertex + 1] += 1
+                continue
+
+            # Skip straight to the lowest allowed candidate
+            first = index
+            index += (remaining & -remaining).bit_length() - 1
+            if report:
+                count_checks(vertex, first, index + 1)
+            next_candidate[vertex] = index + 1
+            colormap[vertex] = tiles_list[index]
+            placed_rows[vertex] = rows_by_index[index]
+            if trace:
+                print("Placing tile", tiles_list[index],  "at vertex", vertex, "tile number", index + 1, "of", num_candidates)
+            if report:
+                record_placement(progress, vertex + 1, tiles_list[index])
+            vertex += 1
+
+        if vertex < start_vertex:
+            return
+        if trace:
+            print("All tiles assigned successfully")
+        if report:
+            record_solution(progress)
+        yield colormap
+        vertex -= 1  # Resume with the next candidate at the last vertex
+
+
+def backtrack_forward_checking(num_tiles, tiles_list, edges_dict, colormap, arc_consistency=True, progress=None,
+                               should_stop=None, allowed_tiles=None):
+    """
+    Search with live candidate domains, forward checking and MRV ordering.
+    
+    Every unassigned vertex keeps a bitset of the catalogue tiles still
+    allowed there. Placing a tile prunes the neighbours' domains at once;
+    with arc_consistency the pruning is propagated further (AC-3). The next
+    vertex is always the one with the fewest candidates left, and an empty
+    domain ends the branch immediately. Vertices already set in colormap are
+    treated as fixed.
+    
+    Args:
+        num_tiles: Number of vertices in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges()
+        colormap: Current color assignments (0 means unassigned)
+        arc_consistency: Propagate pruning beyond the direct neighbours
+        progress: Optional counters from new_progress()
+        should_stop: Optional callable, checked every STOP_CHECK_INTERVAL steps;
+            the search gives up and returns False once it returns True
+        allowed_tiles: Optional list with a bitset per vertex of the tiles_list
+            entries allowed there, e.g. from symmetry_breaking_masks()
+    
+    Returns:
+        True if all tiles were assigned (colormap is filled in), False otherwise
+    """
+    tables = build_compatibility_tables(tiles_list)
+    rows_by_index, placed_rows = placed_compatibility_rows(colormap, tiles_list, tables)
+    neighbors = edges_dict['neighbors']
+    every_candidate = (1 << len(tiles_list)) - 1
+    trace = reporting.VERBOSITY >= TRACE
+    report = progress is not None
+
+    # incoming[u] lists (w, relation of edge (w, u)), i.e. whose domain depends on u
+    incoming = [[] for _ in range(num_tiles)]
+    for w in range(num_tiles):
+        for u, relation in neighbors[w]:
+            incoming[u].append((w, relation))
+
+    domains = list(allowed_tiles) if allowed_tiles is not None else [every_candidate] * num_tiles
+    trail = []  # (vertex, previous domain) for undoing pruning
+    heap = []   # (domain size, vertex), entries go stale and are skipped
+
+    def propagate(queue):
+        # Prune the domains that depend on the vertices in queue
+        while queue:
+            u = queue.pop()
+            rows = placed_rows[u]
+            for w, relation in incoming[u]:
+                if placed_rows[w] is not None:
+                    continue
+                if rows is not None:
+                    support = rows[relation]
+                else:
+                    support = 0
+                    table = tables[relation]
+                    remaining = domains[u]
+                    while remaining:
+                        low = remaining & -remaining
+                        support |= table[low.bit_length() - 1]
+                        remaining ^= low
+                domain = domains[w]
+                pruned = domain & support
+                if pruned != domain:
+                    if report:
+                        record_rejections(progress, relation, (domain ^ pruned).bit_count())
+                    trail.append((w, domain))
+                    domains[w] = pruned
+                    if not pruned:
+                        return False
+                    heapq.heappush(heap, (pruned.bit_count(), w))
+                    if arc_consistency:
+                        queue.append(w)
+        return True
+
+    def undo(mark):
+        while len(trail) > mark:
+            w, domain = trail.pop()
+            domains[w] = domain
+            heapq.heappush(heap, (domain.bit_count(), w))
+
+    def choose():
+        # Most constrained unassigned vertex, or None when all are assigned
+        while heap:
+            size, vertex = heap[0]
+            if placed_rows[vertex] is None and domains[vertex].bit_count() == size:
+                return vertex
+            heapq.heappop(heap)
+        return None
+
+    # Start from the fixed tiles
+    queue = [vertex for vertex in range(num_tiles) if placed_rows[vertex] is not None]
+    if arc_consistency:
+        queue += [vertex for vertex in range(num_tiles) if placed_rows[vertex] is None]
+    if not propagate(queue):
+        return False
+    for vertex in range(num_tiles):
+        if placed_rows[vertex] is None:
+            heapq.heappush(heap, (domains[vertex].bit_count(), vertex))
+    num_fixed = num_tiles - placed_rows.count(None)
+
+    stack = []  # [vertex, trail mark, untried candidates] per decision
+    countdown = STOP_CHECK_INTERVAL
+    vertex = choose()
+    while vertex is not None:
+        stack.append([vertex, len(trail), domains[vertex]])
+        while stack:
+            if should_stop is not None:
+                countdown -= 1
+                if not countdown:
+                    countdown = STOP_CHECK_INTERVAL
+                    if should_stop():
+                        return False
+            frame = stack[-1]
+            vertex, mark, untried = frame
+            undo(mark)
+            if placed_rows[vertex] is not None:
+                placed_rows[vertex] = None
+                colormap[vertex] = 0
+                heapq.heappush(heap, (domains[vertex].bit_count(), vertex))
+            if not untried:
+                stack.pop()
+                if trace:
+                    print("No tile works at vertex", vertex)
+                if report and stack:
+                    progress['backtracks'] += 1
+                    progress['backtracks_at'][vertex] += 1
+                continue
+
+            low = untried & -untried
+            frame[2] = untried ^ low
+            index = low.bit_length() - 1
+            placed_rows[vertex] = rows_by_index[index]
+            colormap[vertex] = tiles_list[index]
+            if trace:
+                print("Placing tile", tiles_list[index], "at vertex", vertex, "with", domains[vertex].bit_count(), "candidates")
+            if report:
+                record_placement(progress, num_fixed + len(stack), tiles_list[index])
+            if propagate([vertex]):
+                break
+            if trace:
+                print("Tile", tiles_list[index], "at vertex", vertex, "empties a neighbouring domain")
+        else:
+            return False
+        vertex = choose()
+
+    if trace:
+        print("All tiles assigned successfully")
+    if report:
+        record_solution(progress)
+    return True
+
+
+def enumerate_rows(column_domains, left_relations, tables, limit):
+    """
+    All rows whose tiles fit each other side by side.
+    
+    Args:
+        column_domains: Bitset of the allowed catalogue tiles for every column
+        left_relations: Relation to the left neighbour for every column
+        tables: Tables from build_compatibility_tables()
+        limit: Maximum number of rows to return
+    
+    Returns:
+        List of tuples of tile indices, or None if there are more than limit
+    """
+    cols = len(column_domains)
+    found = []
+    row = [0] * cols
+    untried = [0] * cols
+    untried[0] = column_domains[0]
+    col = 0
+    while col >= 0:
+        remaining = untried[col]
+        if not remaining:
+            col -= 1
+            continue
+        low = remaining & -remaining
+        untried[col] = remaining ^ low
+        row[col] = low.bit_length() - 1
+        if col == cols - 1:
+            found.append(tuple(row))
+            if len(found) > limit:
+                return None
+        else:
+            col += 1
+            untried[col] = column_domains[col] & tables[left_relations[col]][row[col - 1]]
+    return found
+
+
+def solve_transfer_matrix(rows, cols, tiles_list, edges_dict, max_row_states=MAX_ROW_STATES):
+    """
+    Solve a long, narrow floor one row at a time (transfer matrix).
+    
+    A row state is a full row of tiles that fit side by side. For every row
+    the set of reachable row states is kept as a bitset, built from the
+    states of the row above through memoized row-to-row transitions. A
+    layout is then read back from the last row upwards. The work grows
+    linearly with the number of rows, and once the reachable sets start to
+    repeat the remaining rows are copied. When one row has more than
+    max_row_states states the floor is too wide for this, and
+    backtrack_forward_checking() is used instead, as it is for floor plans
+    from floor_plan_edges(), whose rows are not all alike.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges()
+        max_row_states: Largest number of row states per row parity
+    
+    Returns:
+        colormap if solution found, None otherwise
+    """
+    tiles_list = canonical_catalogue(tiles_list)
+    if 'cells' in edges_dict:
+        if reporting.VERBOSITY >= PROGRESS:
+            print("Floor plan without full rows, falling back to search")
+        colormap = [0] * len(edges_dict['neighbors'])
+        if backtrack_forward_checking(len(colormap), tiles_list, edges_dict, colormap):
+            return colormap
+        return None
+    tables = build_compatibility_tables(tiles_list)
+    left_relations, up_relations = grid_row_relations(rows, cols, edges_dict)
+    every_candidate = (1 << len(tiles_list)) - 1
+
+    states = []
+    state_index = []
+    for parity in range(min(rows, 2)):
+        found = enumerate_rows([every_candidate] * cols, left_relations[parity], tables, max_row_states)
+        if found is None:
+            if reporting.VERBOSITY >= PROGRESS:
+                print("More than", max_row_states, "row states, falling back to search")
+            colormap = [0] * (rows * cols)
+            if backtrack_forward_checking(rows * cols, tiles_list, edges_dict, colormap):
+                return colormap
+            return None
+        states.append(found)
+        state_index.append({state: index for index, state in enumerate(found)})
+    if reporting.VERBOSITY >= PROGRESS:
+        print("Row states per parity:", [len(found) for found in states])
+
+    transitions = [{}, {}]  # memo: state index -> bitset of states allowed in the next row
+
+    def next_states(parity, index):
+        allowed = transitions[parity].get(index)
+        if allowed is None:
+            below = 1 - parity
+            above = states[parity][index]
+            domains = [tables[up_relations[below][col]][above[col]] for col in range(cols)]
+            allowed = 0
+            for state in enumerate_rows(domains, left_relations[below], tables, len(states[below])):
+                allowed |= 1 << state_index[below][state]
+            transitions[parity][index] = allowed
+        return allowed
+
+    # Forward pass: reachable row states of every row
+    reachable = [(1 << len(states[0])) - 1]
+    if not reachable[0]:
+        return None
+    for row in range(1, rows):
+        if row >= 3 and reachable[-1] == reachable[-3]:
+            # The reachable sets now alternate, copy them for the remaining rows
+            while len(reachable) < rows:
+                reachable.append(reachable[-2])
+            break
+        parity = (row - 1) % 2
+        current = reachable[-1]
+        following = 0
+        while current:
+            low = current & -current
+            following |= next_states(parity, low.bit_length() - 1)
+            current ^= low
+        if not following:
+            if reporting.VERBOSITY >= PROGRESS:
+                print("No row fits below row", row - 1)
+            return None
+        reachable.append(following)
+
+    # Backward pass: pick one state per row, each one reachable from the row above
+    chosen = [0] * rows
+    last = reachable[-1]
+    chosen[-1] = (last & -last).bit_length() - 1
+    for row in range(rows - 2, -1, -1):
+        target = 1 << chosen[row + 1]
+        current = reachable[row]
+        while current:
+            low = current & -current
+            if next_states(row % 2, low.bit_length() - 1) & target:
+                chosen[row] = low.bit_length() - 1
+                break
+            current ^= low
+
+    colormap = []
+    for row in range(rows):
+        for index in states[row % 2][chosen[row]]:
+            colormap.append(tiles_list[index])
+    return colormap
+
+
+def solve_periodic(rows, cols, tiles_list, edges_dict=None, max_period=MAX_PERIOD, min_period=2, seed=None):
+    """
+    Lay a floor of any size by stamping a torus patch, searching only if there is none.
+    
+    Once the patch of a catalogue is cached, the work is copying rows * cols
+    entries. With a seed, the patch comes from the shuffled catalogue
+    (see find_periodic_patch()) and is stamped from a random offset, so
+    different seeds give different-looking floors.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from floor_plan_edges() for a floor plan;
+            for a full floor it is only used by the search, and built when None
+        max_period: Largest period tried in each direction
+        min_period: Smallest period tried in each direction
+        seed: Optional seed for a random variant
+    
+    Returns:
+        colormap if solution found, None otherwise
+    """
+    tiles_list = canonical_catalogue(tiles_list)
+    found = find_periodic_patch(tiles_list, max_period, min_period, seed)
+    if found is None:
+        if reporting.VERBOSITY >= PROGRESS:
+            print("No torus patch up to", max_period, "x", max_period, "falling back to search")
+        if edges_dict is None:
+            edges_dict = generate_grid_edges(rows, cols)
+        return solve_coloring(rows, cols, tiles_list, edges_dict, 'forward_checking')
+
+    period_rows, period_cols, patch = found
+    offset = (0, 0)
+    if seed is not None:
+        rng = random.Random(seed)
+        row_offset = rng.randrange(period_rows)
+        offset = (row_offset, rng.randrange(row_offset % 2, period_cols, 2))
+    if edges_dict is not None and 'cells' in edges_dict:
+        rows, cols = edges_dict['shape']
+        full = stamp_patch(patch, period_rows, period_cols, rows, cols, offset)
+        return [full[cell] for cell in edges_dict['cells']]
+    return stamp_patch(patch, period_rows, period_cols, rows, cols, offset)
+
+
+def iter_colorings(rows, cols, tiles_list, edges_dict):
+    """
+    Generate every valid colormap, one at a time.
+    
+    Layouts come in the order the search finds them; the next one is only
+    computed when it is asked for. Duplicate entries in tiles_list are
+    dropped first, so every layout comes once.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges() or floor_plan_edges()
+    
+    Yields:
+        A new colormap list for every solution
+    """
+    num_tiles = len(edges_dict['neighbors'])
+    colormap = [0] * num_tiles
+    tiles_list = canonical_catalogue(tiles_list)
+    for solution in search_iterative(num_tiles, tiles_list, edges_dict, colormap, 0):
+        yield list(solution)
+
+
+def count_colorings(rows, cols, tiles_list, edges_dict, limit=None):
+    """
+    Count the valid colormaps.
+    
+    Tiles are placed one cell at a time in row-major order, and layouts
+    that agree on the last row's worth of cells (the profile) are counted
+    together, so the count is exact without listing every layout. If there
+    are more than MAX_PROFILE_STATES profiles the floor is too big for this:
+    with a limit the layouts from iter_colorings() are counted one by one
+    instead, without one a ValueError is raised, as listing every layout
+    would not finish. Floor plans from floor_plan_edges() are always
+    counted one by one, so give a limit unless the plan is small.
+    Duplicate entries in tiles_list do not count as different layouts.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid
+        tiles_list: List of all possible tile configurations
+        edges_dict: Edge dictionary from generate_grid_edges() or floor_plan_edges()
+        limit: Stop counting at this number; None counts everything
+    
+    Returns:
+        Number of layouts, or limit if there are at least that many
+    
+    Raises:
+        ValueError: When the floor has too many profiles and limit is None
+    """
+    num_tiles = rows * cols
+    tiles_list = canonical_catalogue(tiles_list)
+    if 'cells' in edges_dict:
+        return _count_one_by_one(rows, cols, tiles_list, edges_dict, limit)
+    tables = build_compatibility_tables(tiles_list)
+    neighbors = edges_dict['neighbors']
+    every_candidate = (1 << len(tiles_list)) - 1
+
+    counts = {(): 1}  # last cols tile indices -> number of partial layouts
+    for vertex in range(num_tiles):
+        relation_to = dict(neighbors[vertex])
+        left_relation = relation_to.get(vertex - 1) if vertex % cols else None
+        up_relation = relation_to.get(vertex - cols)
+        following = {}
+        for profile, count in counts.items():
+            allowed = every_candidate
+            if left_relation is not None:
+                allowed &= tables[left_relation][profile[-1]]
+            if up_relation is not None:
+                allowed &= tables[up_relation][profile[0]]
+            base = profile if len(profile) < cols else profile[1:]
+            while allowed:
+                low = allowed & -allowed
+                key = base + (low.bit_length() - 1,)
+                total = following.get(key, 0) + count
+                following[key] = total if limit is None else min(total, limit)
+                allowed ^= low
+        counts = following
+        if not counts:
+            return 0
+        if len(counts) > MAX_PROFILE_STATES:
+            if limit is None:
+                raise ValueError("%dx%d floor has more than %d profiles to count exactly; pass a limit to "
+                                 "count layouts one by one up to it" % (rows, cols, MAX_PROFILE_STATES))
+            if reporting.VERBOSITY >= PROGRESS:
+                print("More than", MAX_PROFILE_STATES, "profiles, counting layouts one by one")
+            return _count_one_by_one(rows, cols, tiles_list, edges_dict, limit)
+
+    total = sum(counts.values())
+    return total if limit is None else min(total, limit)
+
+
+def _count_one_by_one(rows, cols, tiles_list, edges_dict, limit):
+    # Count the layouts from iter_colorings(), stopping at limit
+    total = 0
+    for _ in iter_colorings(rows, cols, tiles_list, edges_dict):
+        total += 1
+        if limit is not None and total >= limit:
+            break
+    return total
@@ -0,0 +1,258 @@
+"""
+Tile catalogues and precomputed tile-to-tile compatibility.
+
+A tile is a list of 4 bar colors [c0, c1, c2, c3], with colors numbered
+as in render.COLORS.
+"""
+import json
+
+from .grid import RELATIONS
+
+# colors = ["black", "green", "red", "blue", "grey", "beige"] as [0 1 2 3 4 5]   
+TILES = [[2,4,1,3],
+         [3,1,4,5],
+         [5,1,0,2],
+         [0,1,2,5],
+         [5,2,1,0],
+         [2,4,1,3],
+         [3,1,4,2],
+         [3,1,2,5],
+         [5,2,1,3],
+         [3,1,4,5],
+         [5,4,1,3],
+         [3,0,1,5],
+         [5,1,0,3],
+         [3,1,2,5],
+         [3,0,1,5],
+         [2,0,1,5]]
+# The longer 24-entry catalogue, not used by default
+TILES_24 = [[3,1,4,5],[5,4,1,3],[3,1,4,2],[2,4,1,3],[3,2,4,1],[1,4,2,3],[4,2,1,3],[3,1,2,4],[2,3,1,4],[4,1,3,2],[2,3,0,4],[4,0,3,2],[2,0,1,5],[5,1,0,2],[0,1,2,5],[5,2,1,0],[2,4,1,3],[3,1,4,2],[3,1,2,5],[5,2,1,3],[3,1,4,5],[5,4,1,3],[3,0,1,5],[5,1,0,3]]
+
+
+def load_tiles(path):
+    """
+    Read a tile catalogue from a JSON file holding a list of 4-color lists.
+    
+    Returns:
+        List of tiles
+    """
+    with open(path) as f:
+        tiles = json.load(f)
+    for tile in tiles:
+        if len(tile) != 4:
+            raise ValueError("Tile %r does not have 4 bars" % (tile,))
+    return [list(tile) for tile in tiles]
+
+
+def canonical_catalogue(tiles_list, reversible=False):
+    """
+    Remove duplicate tiles from a catalogue.
+    
+    Tiles keep the order of their first appearance, so searches try them in
+    the same order as before, and the entries kept are the original lists.
+    
+    Args:
+        tiles_list: List of all possible tile configurations
+        reversible: Also add the reversal of every tile that lacks one, for
+            tiles that may be laid turned around
+    
+    Returns:
+        List of distinct tiles
+    """
+    seen = set()
+    distinct = []
+    for tile in tiles_list:
+        key = tuple(tile)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(tile)
+    if reversible:
+        for tile in list(distinct):
+            key = tuple(reversed(tile))
+            if key not in seen:
+                seen.add(key)
+                distinct.append(list(key))
+    return distinct
+
+
+def reversal_index(tiles_list):
+    """
+    Index of every tile's reversal (bars in the opposite order) in tiles_list.
+    
+    Returns:
+        List indexed like tiles_list, None where the reversal is missing
+    """
+    index_of = {}
+    for index, tile in enumerate(tiles_list):
+        index_of.setdefault(tuple(tile), index)
+    return [index_of.get(tuple(reversed(tile))) for tile in tiles_list]
+
+
+def reversal_groups(tiles_list):
+    """
+    Group the catalogue entries that are the same physical tile.
+    
+    A tile turned around is its reversal, so [3,1,2,5] and [5,2,1,3] are one
+    physical tile, and exact duplicates are too.
+    
+    Returns:
+        List of lists of indices into tiles_list, in order of first appearance
+    """
+    groups = {}
+    for index, tile in enumerate(tiles_list):
+        key = min(tuple(tile), tuple(reversed(tile)))
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
+
+def catalogue_entries(colormap, tiles_list):
+    """
+    Map a colormap back to the entries of the original catalogue.
+    
+    Args:
+        colormap: Color assignments from solve_coloring()
+        tiles_list: The catalogue as given, duplicates included
+    
+    Returns:
+        List with one (index, turned) pair per vertex: index of the first
+        entry in tiles_list equal to the tile laid there, turned False, or
+        failing that equal to its reversal, turned True; None for unassigned
+        vertices and tiles that are not in the catalogue
+    """
+    index_of = {}
+    for index, tile in enumerate(tiles_list):
+        index_of.setdefault(tuple(tile), (index, False))
+    for index, tile in enumerate(tiles_list):
+        index_of.setdefault(tuple(reversed(tile)), (index, True))
+    return [index_of.get(tuple(tile)) if tile != 0 else None for tile in colormap]
+
+
+def tile_masks(tile):
+    """
+    Bitmasks for one tile: bit c is set when color c is on the bar(s).
+    
+    Returns:
+        (all_mask, first_mask, last_mask) for all 4 bars, the first bar and the last bar
+    """
+    all_mask = 0
+    for color in tile:
+        all_mask |= 1 << color
+    return all_mask, 1 << tile[0], 1 << tile[3]
+
+
+def build_tile_masks(tiles_list):
+    """
+    Precompute the bitmasks of every tile in tiles_list.
+    
+    Returns:
+        Three lists (all_masks, first_masks, last_masks) indexed like tiles_list
+    """
+    all_masks = []
+    first_masks = []
+    last_masks = []
+    for tile in tiles_list:
+        all_mask, first_mask, last_mask = tile_masks(tile)
+        all_masks.append(all_mask)
+        first_masks.append(first_mask)
+        last_masks.append(last_mask)
+    return all_masks, first_masks, last_masks
+
+
+def compatible_tiles(neighbor_tile, relation, masks):
+    """
+    Bitset of the tiles that may sit at a vertex whose neighbour holds neighbor_tile.
+    
+    Args:
+        neighbor_tile: List of 4 colors on the neighbouring vertex
+        relation: Relation of the edge (vertex, neighbor), e.g. 'all_to_first'
+        masks: Tile bitmasks from build_tile_masks()
+    
+    Returns:
+        Integer with bit i set when tiles_list[i] is allowed next to neighbor_tile
+    """
+    all_masks, first_masks, last_masks = masks
+    neighbor_all, neighbor_first, neighbor_last = tile_masks(neighbor_tile)
+    if relation == 'all_to_first':
+        ours, theirs = all_masks, neighbor_first
+    elif relation == 'first_to_all':
+        ours, theirs = first_masks, neighbor_all
+    elif relation == 'all_to_last':
+        ours, theirs = all_masks, neighbor_last
+    else:  # last_to_all
+        ours, theirs = last_masks, neighbor_all
+
+    allowed = 0
+    for index, mask in enumerate(ours):
+        if not mask & theirs:
+            allowed |= 1 << index
+    return allowed
+
+
+_compatibility_cache = {}
+
+
+def build_compatibility_tables(tiles_list):
+    """
+    Precompute which tiles may sit next to which, for all four relations.
+    
+    The tables depend only on the tile catalogue, so they are cached per
+    catalogue for the lifetime of the process.
+    
+    Args:
+        tiles_list: List of all possible tile configurations
+    
+    Returns:
+        Dictionary keyed by relation; each value is a list indexed by the
+        neighbour's tile index holding a compatible_tiles() bitset
+    """
+    key = tuple(tuple(tile) for tile in tiles_list)
+    tables = _compatibility_cache.get(key)
+    if tables is None:
+        masks = build_tile_masks(tiles_list)
+        tables = {}
+        for relation in RELATIONS:
+            tables[relation] = [compatible_tiles(tile, relation, masks) for tile in tiles_list]
+        _compatibility_cache[key] = tables
+    return tables
+
+
+def clear_compatibility_cache():
+    """
+    Forget the compatibility tables built so far, e.g. to time building them again.
+    """
+    _compatibility_cache.clear()
+
+
+def placed_compatibility_rows(colormap, tiles_list, tables):
+    """
+    Compatibility rows for every catalogue tile and for the tiles already in colormap.
+    
+    Args:
+        colormap: Current color assignments (0 means unassigned)
+        tiles_list: List of all possible tile configurations
+        tables: Tables from build_compatibility_tables(tiles_list)
+    
+    Returns:
+        (rows_by_index, placed_rows): rows_by_index[i] maps each relation to the
+        table row of tiles_list[i]; placed_rows[vertex] is the same for the tile
+        at vertex, or None where the vertex is unassigned
+    """
+    rows_by_index = [{relation: tables[relation][index] for relation in RELATIONS}
+                     for index in range(len(tiles_list))]
+    index_of = {}
+    for index, tile in enumerate(tiles_list):
+        index_of.setdefault(tuple(tile), index)
+    masks = None
+    placed_rows = [None] * len(colormap)
+    for vertex, tile in enumerate(colormap):
+        if tile != 0:
+            index = index_of.get(tuple(tile))
+            if index is not None:
+                placed_rows[vertex] = rows_by_index[index]
+            else:
+                # A fixed tile that is not in the catalogue
+                if masks is None:
+                    masks = build_tile_masks(tiles_list)
+                placed_rows[vertex] = {relation: compatible_tiles(tile, relation, masks)
+                                       for relation in RELATIONS}
+    return rows_by_index, placed_rows
@@ -0,0 +1,144 @@
+"""
+Checking complete or imported layouts in bulk with NumPy.
+
+issafe() answers for one tile at a time; find_conflicts() checks every
+edge of a floor at once and reports exactly which ones are violated.
+NumPy is imported when these functions are called.
+"""
+from .grid import RELATIONS
+
+# (side whose 4 bars touch, side whose single bar touches, index of that bar)
+# for an edge [vertex, neighbor]; 0 is the vertex and 1 the neighbor
+_RELATION_SIDES = {
+    'all_to_first': (0, 1, 0),
+    'first_to_all': (1, 0, 0),
+    'all_to_last': (0, 1, 3),
+    'last_to_all': (1, 0, 3),
+}
+# Marks an unassigned tile (0 in a colormap) in a colormap array
+UNASSIGNED = (-1, -1, -1, -1)
+
+
+def edge_arrays(edges_dict):
+    """
+    Convert the edge lists from generate_grid_edges() to integer arrays.
+    
+    Args:
+        edges_dict: Edge dictionary from generate_grid_edges() or grid_edge_arrays()
+    
+    Returns:
+        Dictionary mapping each relation to an (E, 2) int64 array of [vertex, neighbor]
+    """
+    import numpy as np
+
+    return {relation: np.asarray(edges_dict[relation], dtype=np.int64).reshape(-1, 2)
+            for relation in RELATIONS}
+
+
+def grid_edge_arrays(rows, cols=None):
+    """
+    Build the edges of generate_grid_edges() directly as integer arrays.
+    
+    Much faster than converting the lists for very large floors; the edges
+    are the same, only their order differs.
+    
+    Args:
+        rows: Number of rows in the grid
+        cols: Number of columns in the grid, defaults to rows (square floor)
+    
+    Returns:
+        Dictionary mapping each relation to an (E, 2) int64 array of [vertex, neighbor]
+    """
+    import numpy as np
+
+    if cols is None:
+        cols = rows
+    row, col = np.divmod(np.arange(rows * cols, dtype=np.int64), cols)
+    node = row * cols + col
+    is_vertical = (row + col) % 2 == 1
+    edges = {relation: [] for relation in RELATIONS}
+    # (neighbor exists, offset, relation for vertical tiles, relation for horizontal tiles)
+    directions = [
+        (col + 1 < cols, 1, 'last_to_all', 'all_to_first'),
+        (col >= 1, -1, 'first_to_all', 'all_to_last'),
+        (row >= 1, -cols, 'all_to_last', 'first_to_all'),
+        (row + 1 < rows, cols, 'all_to_first', 'last_to_all'),
+    ]
+    for exists, offset, vertical_relation, horizontal_relation in directions:
+        for relation, selected in ((vertical_relation, exists & is_vertical),
+                                   (horizontal_relation, exists & ~is_vertical)):
+            vertices = node[selected]
+            edges[relation].append(np.stack([vertices, vertices + offset], axis=1))
+    return {relation: np.concatenate(parts) for relation, parts in edges.items()}
+
+
+def colormap_array(colormap):
+    """
+    Convert a colormap to an (N, 4) int8 array, with UNASSIGNED rows for 0 entries.
+    
+    Args:
+        colormap: List with a 4-bar tile or 0 per vertex, or an (N, 4) array
+    
+    Raises:
+        ValueError: For an array of another shape, or an entry that is
+            neither a 4-bar tile nor 0
+    """
+    import numpy as np
+
+    if isinstance(colormap, np.ndarray):
+        if colormap.ndim != 2 or colormap.shape[1] != 4:
+            raise ValueError("Expected an (N, 4) colormap array, got shape %r" % (colormap.shape,))
+        return colormap
+    try:
+        bars = np.array(colormap, dtype=np.int8)
+    except ValueError:  # some tiles are unassigned
+        bars = None
+    if bars is not None and bars.ndim == 2 and bars.shape[1] == 4:
+        return bars
+    rows = []
+    for tile in colormap:
+        if isinstance(tile, (list, tuple)):
+            if len(tile) != 4:
+                raise ValueError("Colormap entry %r is neither a 4-bar tile nor 0" % (tile,))
+            rows.append(tile)
+        elif tile == 0:
+            rows.append(UNASSIGNED)
+        else:
+            raise ValueError("Colormap entry %r is neither a 4-bar tile nor 0" % (tile,))
+    return np.array(rows, dtype=np.int8).reshape(-1, 4)
+
+
+def find_conflicts(colormap, edges_dict):
+    """
+    Find every edge whose two tiles share a color where they touch.
+    
+    Each contact is listed twice in the edge lists, once from each side;
+    it is checked and reported once, from its lower-numbered vertex.
+    Edges with an unassigned tile are skipped.
+    
+    Args:
+        colormap: Color assignments, a list as from solve_coloring() or an (N, 4) array
+        edges_dict: Edge dictionary from generate_grid_edges() or grid_edge_arrays()
+    
+    Returns:
+        Dictionary mapping each relation to an (K, 2) array of the violating
+        [vertex, neighbor] edges; all empty for a valid layout
+    """
+    bars = colormap_array(colormap)
+    assigned = bars[:, 0] >= 0
+    conflicts = {}
+    for relation, edges in edge_arrays(edges_dict).items():
+        edges = edges[edges[:, 0] < edges[:, 1]]
+        edges = edges[assigned[edges[:, 0]] & assigned[edges[:, 1]]]
+        all_side, bar_side, bar = _RELATION_SIDES[relation]
+        touching_bar = bars[edges[:, bar_side], bar]
+        clash = (bars[edges[:, all_side]] == touching_bar[:, None]).any(axis=1)
+        conflicts[relation] = edges[clash]
+    return conflicts
+
+
+def count_conflicts(colormap, edges_dict):
+    """
+    Count the violated edges of a layout; 0 means the layout is valid.
+    """
+    return sum(len(edges) for edges in find_conflicts(colormap, edges_dict).values())